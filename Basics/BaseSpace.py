@@ -11,6 +11,7 @@ BaseSpace, including
 __all__=['BaseSpace', 'KSpace', 'KPath', 'TSpace', 'FBZ']
 
 from collections import OrderedDict
+from numbers import Integral
 from .Geometry import volume,isonline
 from .QuantumNumber import QuantumNumbers,NewQuantumNumber
 import numpy as np
@@ -18,6 +19,12 @@ import numpy.linalg as nl
 import matplotlib.pyplot as plt
 import itertools as it
 
+KVOLUMES={
+    1:  nl.norm,
+    2:  lambda v1,v2: nl.norm(np.cross(v1,v2)),
+    3:  lambda v1,v2,v3: abs(volume(v1,v2,v3))
+    }
+
 class BaseSpace(object):
     '''
     This class provides a unified description of parameter spaces.
@@ -46,9 +53,8 @@ class BaseSpace(object):
             * tuple[2]: float, optional
                 The volume of the parameter space..
         '''
-        self.tags=[para[0] for para in contents]
-        self.meshes=[para[1] for para in contents]
-        self.volumes=[para[2] if len(para)==3 else None for para in contents]
+        paras=[(para[0],para[1],para[2] if len(para)==3 else None) for para in contents]
+        self.tags,self.meshes,self.volumes=[list(item) for item in zip(*paras)] if paras else ([],[],[])
 
     def __str__(self):
         '''
@@ -105,18 +111,44 @@ class BaseSpace(object):
         
         Notes
         -----
-        Only two dimensional base spaces are supported.
+        * Only two dimensional base spaces are supported.
+        * All the meshes are drawn on the same figure, which is saved only once as "name_tag1_tag2_....png".
         '''
-        plt.axis('equal')
-        for tag,mesh in zip(self.tags,self.meshes):
-            x=mesh[:,0]
-            y=mesh[:,1]
-            plt.scatter(x,y)
-            plt.title(name)
-            if show and suspend: plt.show()
-            if show and not suspend: plt.pause(1)
-            if save: plt.savefig('%s_%s.png'%(name,tag))
-        plt.close()
+        fig,ax=plt.subplots()
+        ax.axis('equal')
+        ax.set_title(name)
+        for mesh in self.meshes:
+            ax.scatter(mesh[:,0],mesh[:,1])
+        if show and suspend: plt.show()
+        if show and not suspend: plt.pause(1)
+        if save: fig.savefig('%s_%s.png'%(name,'_'.join(self.tags)))
+        plt.close(fig)
+
+def _kgrid_(icoords,periods,reciprocals,segments=None):
+    '''
+    This function converts the integer coordinates of a grid in the reciprocal space to the cartesian coordinates.
+
+    Parameters
+    ----------
+    icoords : 2d ndarray of int
+        The integer coordinates of the grid points, with each row for a point.
+    periods : iterable of int
+        The number of divisions along each translation vector.
+    reciprocals : iterable of 1d ndarray
+        The translation vectors of the reciprocal lattice.
+    segments : list of 2-tuple, optional
+        The relative start and stop positions along each translation vector.
+
+    Returns
+    -------
+    2d ndarray
+        The cartesian coordinates of the grid points.
+    '''
+    fcoords=icoords/np.asarray(periods,dtype=np.float64)
+    if segments is not None:
+        starts,stops=np.asarray(segments,dtype=np.float64).T
+        fcoords=starts+(stops-starts)*fcoords
+    return np.dot(fcoords,np.asarray(reciprocals))
 
 def KSpace(reciprocals,nk=100,segments=None,end=False):
     '''
@@ -136,9 +168,10 @@ def KSpace(reciprocals,nk=100,segments=None,end=False):
     nvectors=len(reciprocals)
     segments=[(-0.5,0.5)]*nvectors if segments is None else segments
     assert len(segments)==nvectors and nvectors in (1,2,3)
-    vol=(nl.norm if nvectors==1 else (np.cross if nvectors==2 else volume))(*reciprocals)
-    mesh=[np.dot([a+(b-a)*i/(nk-1 if end else nk) for (a,b),i in zip(segments,pos)],reciprocals) for pos in it.product(*([range(nk)]*nvectors))]
-    return BaseSpace(('k',np.asarray(mesh),np.abs(vol)))
+    vol=float(KVOLUMES[nvectors](*reciprocals))
+    icoords=np.indices((nk,)*nvectors).reshape((nvectors,-1)).T
+    mesh=_kgrid_(icoords,(nk-1 if end else nk,)*nvectors,reciprocals,segments)
+    return BaseSpace(('k',mesh,vol))
 
 def KPath(path,nk=100,ends=None,mode='R'):
     '''
@@ -198,26 +231,31 @@ class FBZ(QuantumNumbers,BaseSpace):
         nks : iterable of int, optional
             The number of points along each translation vector i.e. the periods along each direction.
         '''
-        nks=(nks or 100,)*len(reciprocals) if type(nks) in (int,type(None)) else nks
+        nks=(nks or 100,)*len(reciprocals) if nks is None or isinstance(nks,Integral) else nks
+        nks=tuple(int(nk) for nk in nks)
         assert len(nks)==len(reciprocals)
         qntype=NewQuantumNumber('kp',tuple('k%s'%(i+1) for i in range(len(nks))),nks)
-        data=np.array(list(it.product(*[range(nk) for nk in nks])))
-        counts=np.ones(np.product(nks),dtype=np.int64)
+        total=int(np.prod(nks,dtype=np.int64))
+        data=np.indices(nks,dtype=np.int64).reshape((len(nks),total)).T.copy()
+        counts=np.ones(total,dtype=np.int64)
         super(FBZ,self).__init__('C',(qntype,data,counts),protocol=QuantumNumbers.COUNTS)
         self.tags=['k']
-        self.volumes=[(nl.norm if len(nks)==1 else (np.cross if len(nks)==2 else volume))(*reciprocals)]
+        self.volumes=[float(KVOLUMES[len(nks)](*reciprocals))]
         self.reciprocals=np.asarray(reciprocals)
+        self._meshes_=(None,None)
 
     @property
     def meshes(self):
         '''
         The mesh of the FBZ.
+
+        Notes
+        -----
+        The mesh is cached and only recomputed when the contents of the FBZ have been replaced, e.g. by a sort.
         '''
-        nks=np.array(self.type.periods,dtype=np.float64)
-        mesh=np.zeros((self.contents.shape[0],self.reciprocals.shape[1]),dtype=self.reciprocals.dtype)
-        for i,icoord in enumerate(self.contents):
-            mesh[i,:]=np.dot(self.reciprocals.T,icoord/nks)
-        return [mesh]
+        if self._meshes_[0] is not self.contents:
+            self._meshes_=(self.contents,[_kgrid_(self.contents,self.type.periods,self.reciprocals)])
+        return self._meshes_[1]
 
     def kcoord(self,k):
         '''
@@ -460,6 +460,7 @@ class IndexPack(Arithmetic):
     value : float or complex
         The overall coefficient of the IndexPack.
     '''
+    __slots__=('value',)
 
     def __init__(self,value):
         '''
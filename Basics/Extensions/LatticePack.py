@@ -154,10 +154,10 @@ class Cluster(object):
         assert len(ts)==len(self.vectors)
         result=Cluster.__new__(self.__class__)
         result.name=self.name
-        result.rcoords=np.asarray(tiling(cluster=self.rcoords,vectors=self.vectors,translations=it.product(*[range(t) for t in ts])))
+        result.rcoords=tiling(cluster=self.rcoords,vectors=self.vectors,translations=it.product(*[range(t) for t in ts]),asarray=True)
         result.vectors=np.asarray([self.vectors[i]*t for i,t in enumerate(ts)])
         result.tiles=['%s%s'%('' if self.tiles is None else self.tiles[i]+'^',str(t)) for t in ts]
-        result.baths=None if self.baths is None else np.asarray(tiling(cluster=self.baths,vectors=self.vectors,translations=it.product(*[range(t) for t in ts])))
+        result.baths=None if self.baths is None else tiling(cluster=self.baths,vectors=self.vectors,translations=it.product(*[range(t) for t in ts]),asarray=True)
         result.pieces=None if self.pieces is None else self.pieces.tiling(ts)
         return result
 
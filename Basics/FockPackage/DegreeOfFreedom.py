@@ -14,12 +14,13 @@ __all__=[   'ANNIHILATION','CREATION','DEFAULT_FOCK_PRIORITY','DEFAULT_FERMIONIC
             'sigma0','sigmax','sigmay','sigmaz','sigmap','sigmam'
             ]
 
-from numpy.linalg import norm
 from ..Utilities import RZERO,decimaltostr
 from ..Geometry import PID
 from ..DegreeOfFreedom import *
 from copy import copy
 from collections import namedtuple
+from functools import lru_cache
+import itertools as it
 
 ANNIHILATION,CREATION=0,1
 DEFAULT_FOCK_PRIORITY=('scope','nambu','site','orbital','spin')
@@ -49,6 +50,17 @@ class FID(namedtuple('FID',['orbital','spin','nambu'])):
 
 FID.__new__.__defaults__=(0,0,ANNIHILATION)
 
+@lru_cache(maxsize=None)
+def _fids_(norbital,nspin,nnambu,mask):
+    '''
+    The masked fids of a Fock space, which are shared by all the points with the same internal degrees of freedom.
+    '''
+    return tuple(   FID(orbital=orbital,spin=spin,nambu=nambu)
+                    for nambu in ((None,) if 'nambu' in mask else range(nnambu))
+                    for spin in ((None,) if 'spin' in mask else range(nspin))
+                    for orbital in ((None,) if 'orbital' in mask else range(norbital))
+                    )
+
 class Fock(Internal):
     '''
     This class defines the internal fermionic/bosonic degrees of freedom in a single point.
@@ -97,7 +109,13 @@ class Fock(Internal):
         '''
         Overloaded operator(==).
         '''
-        return self.atom==other.atom and self.norbital==other.norbital and self.nspin==other.nspin and self.nnambu==other.nnambu
+        return type(self) is type(other) and (self.atom,self.norbital,self.nspin,self.nnambu)==(other.atom,other.norbital,other.nspin,other.nnambu)
+
+    def __hash__(self):
+        '''
+        Return the hash value of the Fock.
+        '''
+        return hash((self.atom,self.norbital,self.nspin,self.nnambu))
 
     def indices(self,pid,mask=()):
         '''
@@ -115,13 +133,8 @@ class Fock(Internal):
         list of Index
             The indices.
         '''
-        result=[]
         pid=pid._replace(**{key:None for key in set(mask)&set(PID._fields)})
-        for nambu in (None,) if 'nambu' in mask else range(self.nnambu):
-            for spin in (None,) if 'spin' in mask else range(self.nspin):
-                for orbital in (None,) if 'orbital' in mask else range(self.norbital):
-                    result.append(Index(pid=pid,iid=FID(orbital=orbital,spin=spin,nambu=nambu)))
-        return result
+        return [Index(pid=pid,iid=fid) for fid in _fids_(self.norbital,self.nspin,self.nnambu,frozenset(mask)&frozenset(FID._fields))]
 
 class FockPack(IndexPack):
     '''
@@ -138,6 +151,7 @@ class FockPack(IndexPack):
     nambus : 2-tuple of int, optional
         The nambu indices of a quadratic term.
     '''
+    __slots__=('atoms','orbitals','spins','nambus')
 
     def __init__(self,value=1.0,atoms=None,orbitals=None,spins=None,nambus=None):
         '''
@@ -157,18 +171,14 @@ class FockPack(IndexPack):
             The nambu indices.
         '''
         super(FockPack,self).__init__(value)
-        if atoms is not None:
-            assert len(atoms)==2
-            self.atoms=tuple(atoms)
-        if orbitals is not None:
-            assert len(orbitals)==2
-            self.orbitals=tuple(orbitals)
-        if spins is not None:
-            assert len(spins)==2
-            self.spins=tuple(spins)
-        if nambus is not None:
-            assert len(nambus)==2
-            self.nambus=tuple(nambus)
+        assert atoms is None or len(atoms)==2
+        assert orbitals is None or len(orbitals)==2
+        assert spins is None or len(spins)==2
+        assert nambus is None or len(nambus)==2
+        self.atoms=None if atoms is None else tuple(atoms)
+        self.orbitals=None if orbitals is None else tuple(orbitals)
+        self.spins=None if spins is None else tuple(spins)
+        self.nambus=None if nambus is None else tuple(nambus)
 
     def tostr(self,mask=(),form='repr'):
         '''
@@ -190,17 +200,17 @@ class FockPack(IndexPack):
         if form=='repr':
             condition=isinstance(self.value,complex) and abs(self.value.real)>5*10**-6 and abs(self.value.imag)>5*10**-6
             temp=['(%s)'%decimaltostr(self.value)] if condition else [decimaltostr(self.value)]
-            if hasattr(self,'atoms') and 'atoms' not in mask: temp.append('sl%s%s'%self.atoms)
-            if hasattr(self,'orbitals') and 'orbitals' not in mask: temp.append('ob%s%s'%self.orbitals)
-            if hasattr(self,'spins') and 'spins' not in mask: temp.append('sp%s%s'%self.spins)
-            if hasattr(self,'nambus') and 'nambus' not in mask: temp.append('ph%s%s'%self.nambus)
+            if self.atoms is not None and 'atoms' not in mask: temp.append('sl%s%s'%self.atoms)
+            if self.orbitals is not None and 'orbitals' not in mask: temp.append('ob%s%s'%self.orbitals)
+            if self.spins is not None and 'spins' not in mask: temp.append('sp%s%s'%self.spins)
+            if self.nambus is not None and 'nambus' not in mask: temp.append('ph%s%s'%self.nambus)
             return '*'.join(temp)
         else:
             temp=['value=%s'%self.value]
-            if hasattr(self,'atoms') and 'atoms' not in mask: temp.append('atoms='+str(self.atoms))
-            if hasattr(self,'orbitals') and 'orbitals' not in mask: temp.append('orbitals='+str(self.orbitals))
-            if hasattr(self,'spins') and 'spins' not in mask: temp.append('spins='+str(self.spins))
-            if hasattr(self,'nambus') and 'nambus' not in mask: temp.append('nambus='+str(self.nambus))
+            if self.atoms is not None and 'atoms' not in mask: temp.append('atoms='+str(self.atoms))
+            if self.orbitals is not None and 'orbitals' not in mask: temp.append('orbitals='+str(self.orbitals))
+            if self.spins is not None and 'spins' not in mask: temp.append('spins='+str(self.spins))
+            if self.nambus is not None and 'nambus' not in mask: temp.append('nambus='+str(self.nambus))
             return ''.join(['FockPack(',', '.join(temp),')'])
 
     def __repr__(self):
@@ -224,22 +234,26 @@ class FockPack(IndexPack):
                 delta=lambda i,j: 1.0 if i==j else 0.0
                 result=FockPack(self.value*other.value)
                 for attr in ('atoms','orbitals','spins','nambus'):
-                    if hasattr(self,attr) and hasattr(other,attr):
-                        setattr(result,attr,(getattr(self,attr)[0],getattr(other,attr)[1]))
-                        result.value*=delta(getattr(self,attr)[1],getattr(other,attr)[0])
-                    elif hasattr(self,attr):
-                        setattr(result,attr,getattr(self,attr))
-                    elif hasattr(other,attr):
-                        setattr(result,attr,getattr(other,attr))
+                    sattr,oattr=getattr(self,attr),getattr(other,attr)
+                    if sattr is not None and oattr is not None:
+                        setattr(result,attr,(sattr[0],oattr[1]))
+                        result.value*=delta(sattr[1],oattr[0])
+                    else:
+                        setattr(result,attr,oattr if sattr is None else sattr)
             else:
                 result=copy(self)
                 result.value=self.value*other
             return result
+        def ORTHOGONAL(self,other):
+            return any( sattr is not None and oattr is not None and sattr[1]!=oattr[0]
+                        for sattr,oattr in ((self.atoms,other.atoms),(self.orbitals,other.orbitals),(self.spins,other.spins),(self.nambus,other.nambus))
+                        )
         if isinstance(other,IndexPacks):
             result=IndexPacks()
             for fpack in other:
+                if isinstance(fpack,FockPack) and ORTHOGONAL(self,fpack): continue
                 temp=MUL(self,fpack)
-                if norm(temp.value)>RZERO: result.append(temp)
+                if abs(temp.value)>RZERO: result.append(temp)
         else:
             result=MUL(self,other)
         return result
@@ -248,12 +262,13 @@ class FockPack(IndexPack):
         '''
         Overloaded operator(==).
         '''
-        return (    self.value==other.value and 
-                    getattr(self,'atoms',None)==getattr(other,'atoms',None) and 
-                    getattr(self,'orbitals',None)==getattr(other,'orbitals',None) and 
-                    getattr(self,'spins',None)==getattr(other,'spins',None) and 
-                    getattr(self,'nambus',None)==getattr(other,'nambus',None)
-                    )
+        return (self.value,self.atoms,self.orbitals,self.spins,self.nambus)==(other.value,other.atoms,other.orbitals,other.spins,other.nambus)
+
+    def __hash__(self):
+        '''
+        Return the hash value of the Fock pack, which depends only on its indices because its value is mutable.
+        '''
+        return hash((self.atoms,self.orbitals,self.spins,self.nambus))
 
     def expand(self,bond,sdgr,edgr):
         '''
@@ -274,151 +289,75 @@ class FockPack(IndexPack):
             * index1,index2 : Index
                 The indices of the quadratic.
         '''
-        if not hasattr(self,'atoms') or (edgr.atom,sdgr.atom)==self.atoms:
-            enambu,snambu=self.nambus if hasattr(self,'nambus') else (CREATION,ANNIHILATION)
-            if hasattr(self,'spins'):
-                if hasattr(self,'orbitals'):
-                    index1=Index(bond.epoint.pid,FID(self.orbitals[0],self.spins[0],enambu))
-                    index2=Index(bond.spoint.pid,FID(self.orbitals[1],self.spins[1],snambu))
-                    yield self.value,index1,index2
-                else:
-                    assert edgr.norbital==sdgr.norbital
-                    for k in range(edgr.norbital):
-                        index1=Index(bond.epoint.pid,FID(k,self.spins[0],enambu))
-                        index2=Index(bond.spoint.pid,FID(k,self.spins[1],snambu))
-                        yield self.value,index1,index2
-            else:
-                assert edgr.nspin==sdgr.nspin
-                if hasattr(self,'orbitals'):
-                    for k in range(edgr.nspin):
-                        index1=Index(bond.epoint.pid,FID(self.orbitals[0],k,enambu))
-                        index2=Index(bond.spoint.pid,FID(self.orbitals[1],k,snambu))
-                        yield self.value,index1,index2
-                else:
-                    assert edgr.norbital==sdgr.norbital
-                    for k in range(edgr.nspin):
-                        for j in range(edgr.norbital):
-                            index1=Index(bond.epoint.pid,FID(j,k,enambu))
-                            index2=Index(bond.spoint.pid,FID(j,k,snambu))
-                            yield self.value,index1,index2
-        else:
-            return
-            yield
+        if self.atoms is None or (edgr.atom,sdgr.atom)==self.atoms:
+            assert self.spins is not None or edgr.nspin==sdgr.nspin
+            assert self.orbitals is not None or edgr.norbital==sdgr.norbital
+            nspin=None if self.spins is not None else edgr.nspin
+            norbital=None if self.orbitals is not None else edgr.norbital
+            epid,spid=bond.epoint.pid,bond.spoint.pid
+            for efid,sfid in _fidpairs_(self.spins,self.orbitals,self.nambus,nspin,norbital):
+                yield self.value,Index(epid,efid),Index(spid,sfid)
+
+@lru_cache(maxsize=None)
+def _fidpairs_(spins,orbitals,nambus,nspin,norbital):
+    '''
+    The fid pairs of the expansion of a Fock pack, which are shared by all the bonds with the same internal degrees of freedom.
+    '''
+    enambu,snambu=(CREATION,ANNIHILATION) if nambus is None else nambus
+    spins=[(k,k) for k in range(nspin)] if spins is None else (spins,)
+    orbitals=[(k,k) for k in range(norbital)] if orbitals is None else (orbitals,)
+    return tuple((FID(eorbital,espin,enambu),FID(sorbital,sspin,snambu)) for (espin,sspin),(eorbital,sorbital) in it.product(spins,orbitals))
+
+SIGMA_ATTRS={'sp':'spins','ob':'orbitals','sl':'atoms','ph':'nambus'}
+SIGMA_TABLES={
+    'sigma0':   ([(1.0,(0,0)),(1.0,(1,1))],                 [(1.0,(ANNIHILATION,CREATION)),(1.0,(CREATION,ANNIHILATION))]),
+    'sigmax':   ([(1.0,(0,1)),(1.0,(1,0))],                 [(1.0,(ANNIHILATION,ANNIHILATION)),(1.0,(CREATION,CREATION))]),
+    'sigmay':   ([(1.0j,(0,1)),(-1.0j,(1,0))],              [(1.0j,(ANNIHILATION,ANNIHILATION)),(-1.0j,(CREATION,CREATION))]),
+    'sigmaz':   ([(-1.0,(0,0)),(1.0,(1,1))],                [(-1.0,(ANNIHILATION,CREATION)),(1.0,(CREATION,ANNIHILATION))]),
+    'sigmap':   ([(1.0,(1,0))],                             [(1.0,(CREATION,CREATION))]),
+    'sigmam':   ([(1.0,(0,1))],                             [(1.0,(ANNIHILATION,ANNIHILATION))])
+    }
+
+def _sigma_(name,mode):
+    '''
+    Construct the Fock packs of a Pauli matrix from the lookup tables.
+    '''
+    attr=SIGMA_ATTRS.get(mode.lower())
+    if attr is None: raise ValueError("%s error: mode '%s' not supported, which must be 'sp', 'ob', 'sl' or 'ph'."%(name,mode))
+    return IndexPacks(*[FockPack(value,**{attr:pair}) for value,pair in SIGMA_TABLES[name][attr=='nambus']])
 
 def sigma0(mode):
     '''
     The 2-dimensional identity matrix, which can act on the space of spins('sp'), orbitals('ob'), sublattices('sl') or particle-holes('ph').
     '''
-    result=IndexPacks()
-    if mode.lower()=='sp':
-        result.append(FockPack(1.0,spins=(0,0)))
-        result.append(FockPack(1.0,spins=(1,1)))
-    elif mode.lower()=='ob':
-        result.append(FockPack(1.0,orbitals=(0,0)))
-        result.append(FockPack(1.0,orbitals=(1,1)))
-    elif mode.lower()=='sl':
-        result.append(FockPack(1.0,atoms=(0,0)))
-        result.append(FockPack(1.0,atoms=(1,1)))
-    elif mode.lower()=='ph':
-        result.append(FockPack(1.0,nambus=(ANNIHILATION,CREATION)))
-        result.append(FockPack(1.0,nambus=(CREATION,ANNIHILATION)))
-    else:
-        raise ValueError("sigma0 error: mode '%s' not supported, which must be 'sp', 'ob', 'sl' or 'ph'."%mode)
-    return result
+    return _sigma_('sigma0',mode)
 
 def sigmax(mode):
     '''
     The Pauli matrix sigmax, which can act on the space of spins('sp'), orbitals('ob'), sublattices('sl') or particle-holes('ph').
     '''
-    result=IndexPacks()
-    if mode.lower()=='sp':
-        result.append(FockPack(1.0,spins=(0,1)))
-        result.append(FockPack(1.0,spins=(1,0)))
-    elif mode.lower()=='ob':
-        result.append(FockPack(1.0,orbitals=(0,1)))
-        result.append(FockPack(1.0,orbitals=(1,0)))
-    elif mode.lower()=='sl':
-        result.append(FockPack(1.0,atoms=(0,1)))
-        result.append(FockPack(1.0,atoms=(1,0)))
-    elif mode.lower()=='ph':
-        result.append(FockPack(1.0,nambus=(ANNIHILATION,ANNIHILATION)))
-        result.append(FockPack(1.0,nambus=(CREATION,CREATION)))
-    else:
-        raise ValueError("sigmax error: mode '%s' not supported, which must be 'sp', 'ob', 'sl' or 'ph'."%mode)
-    return result
+    return _sigma_('sigmax',mode)
 
 def sigmay(mode):
     '''
     The Pauli matrix sigmay, which can act on the space of spins('sp'), orbitals('ob'), sublattices('sl') or particle-holes('ph').
     '''
-    result=IndexPacks()
-    if mode.lower()=='sp':
-        result.append(FockPack(1.0j,spins=(0,1)))
-        result.append(FockPack(-1.0j,spins=(1,0)))
-    elif mode.lower()=='ob':
-        result.append(FockPack(1.0j,orbitals=(0,1)))
-        result.append(FockPack(-1.0j,orbitals=(1,0)))
-    elif mode.lower()=='sl':
-        result.append(FockPack(1.0j,atoms=(0,1)))
-        result.append(FockPack(-1.0j,atoms=(1,0)))
-    elif mode.lower()=='ph':
-        result.append(FockPack(1.0j,nambus=(ANNIHILATION,ANNIHILATION)))
-        result.append(FockPack(-1.0j,nambus=(CREATION,CREATION)))
-    else:
-        raise ValueError("sigmay error: mode '%s' not supported, which must be 'sp', 'ob', 'sl' or 'ph'."%mode)
-    return result
+    return _sigma_('sigmay',mode)
 
 def sigmaz(mode):
     '''
     The Pauli matrix sigmaz, which can act on the space of spins('sp'), orbitals('ob'), sublattices('sl') or particle-holes('ph').
     '''
-    result=IndexPacks()
-    if mode.lower()=='sp':
-        result.append(FockPack(-1.0,spins=(0,0)))
-        result.append(FockPack(1.0,spins=(1,1)))
-    elif mode.lower()=='ob':
-        result.append(FockPack(-1.0,orbitals=(0,0)))
-        result.append(FockPack(1.0,orbitals=(1,1)))
-    elif mode.lower()=='sl':
-        result.append(FockPack(-1.0,atoms=(0,0)))
-        result.append(FockPack(1.0,atoms=(1,1)))
-    elif mode.lower()=='ph':
-        result.append(FockPack(-1.0,nambus=(ANNIHILATION,CREATION)))
-        result.append(FockPack(1.0,nambus=(CREATION,ANNIHILATION)))
-    else:
-        raise ValueError("sigmaz error: mode '%s' not supported, which must be 'sp', 'ob', 'sl' or 'ph'."%mode)
-    return result
+    return _sigma_('sigmaz',mode)
 
 def sigmap(mode):
     '''
     The Pauli matrix sigma plus, which can act on the space of spins('sp'), orbitals('ob'), sublattices('sl') or particle-holes('ph').
     '''
-    result=IndexPacks()
-    if mode.lower()=='sp':
-        result.append(FockPack(1.0,spins=(1,0)))
-    elif mode.lower()=='ob':
-        result.append(FockPack(1.0,orbitals=(1,0)))
-    elif mode.lower()=='sl':
-        result.append(FockPack(1.0,atoms=(1,0)))
-    elif mode.lower()=='ph':
-        result.append(FockPack(1.0,nambus=(CREATION,CREATION)))
-    else:
-        raise ValueError("sigmap error: mode '%s' not supported, which must be 'sp', 'ob', 'sl' or 'ph'."%mode)
-    return result
+    return _sigma_('sigmap',mode)
 
 def sigmam(mode):
     '''
     The Pauli matrix sigma minus, which can act on the space of spins('sp'), orbitals('ob'), sublattices('sl') or particle-holes('ph').
     '''
-    result=IndexPacks()
-    if mode.lower()=='sp':
-        result.append(FockPack(1.0,spins=(0,1)))
-    elif mode.lower()=='ob':
-        result.append(FockPack(1.0,orbitals=(0,1)))
-    elif mode.lower()=='sl':
-        result.append(FockPack(1.0,atoms=(0,1)))
-    elif mode.lower()=='ph':
-        result.append(FockPack(1.0,nambus=(ANNIHILATION,ANNIHILATION)))
-    else:
-        raise ValueError("sigmam error: mode '%s' not supported, which must be 'sp', 'ob', 'sl' or 'ph'."%mode)
-    return result
+    return _sigma_('sigmam',mode)
@@ -13,7 +13,7 @@ import numpy as np
 from .Basis import sequence
 from .Operator import FOperator,BOperator
 from scipy.sparse import csr_matrix
-from numba import jit
+from numba import jit,prange
 
 def foptrep(operator,basis,transpose=False,dtype=np.complex128):
     '''
@@ -42,56 +42,41 @@ def foptrep(operator,basis,transpose=False,dtype=np.complex128):
         * The returned sparse matrix is always constructed by ``csr_matrix(...)`` since a csc-matrix is just a transpose of a csr-formed matrix.
     '''
     assert isinstance(operator,FOperator) or isinstance(operator,BOperator)
-    value,nambus,seqs=dtype(operator.value),(np.array([index.nambu for index in operator.indices])>0)[::-1],np.array(operator.seqs)[::-1]
+    value,nambus,seqs=dtype(operator.value),(np.array([index.nambu for index in operator.indices])>0)[::-1],np.array(operator.seqs,dtype=np.int64)[::-1]
+    mode=0 if isinstance(operator,FOperator) else 1
     if operator.rank%2==0:
-        content=foptrepeven(value,nambus,seqs,basis.table,basis.nbasis,0 if isinstance(operator,FOperator) else 1)
-        result=csr_matrix(content,shape=(basis.nbasis,basis.nbasis))
+        table1=table2=np.asarray(basis.table,dtype=np.int64)
+        shape=(basis.nbasis,basis.nbasis)
     else:
         assert len(basis)==2
-        content=foptrepodd(value,nambus,seqs,basis[0].table,basis[1].table,basis[0].nbasis,0 if isinstance(operator,FOperator) else 1)
-        result=csr_matrix(content,shape=(basis[0].nbasis,basis[1].nbasis))
+        table1,table2=np.asarray(basis[0].table,dtype=np.int64),np.asarray(basis[1].table,dtype=np.int64)
+        shape=(basis[0].nbasis,basis[1].nbasis)
+    data,indices,mask=np.zeros(shape[0],dtype=dtype),np.zeros(shape[0],dtype=np.int64),np.zeros(shape[0],dtype=np.bool_)
+    _foptrep_(value,nambus,seqs,table1,table2,shape[0],mode,data,indices,mask)
+    indptr=np.zeros(shape[0]+1,dtype=np.int64)
+    np.cumsum(mask,out=indptr[1:])
+    result=csr_matrix((data[mask],indices[mask],indptr),shape=shape)
     return result.T if transpose else result
 
-@jit("Tuple((pyobject,int64[:],int64[:]))(pyobject,boolean[:],int64[:],int64[:],int64,int64)")
-def foptrepeven(value,nambus,seqs,table,nbasis,mode):
-    ndata,data,indices,indptr=0,np.zeros(nbasis,dtype=value.dtype),np.zeros(nbasis,dtype=np.int64),np.zeros(nbasis+1,dtype=np.int64)
-    eye,temp=int(1),np.zeros(len(seqs)+1,dtype=np.int64)
-    for i in range(nbasis):
-        indptr[i]=ndata
-        temp[0]=i if len(table)==0 else table[i]
+@jit(nopython=True,nogil=True,parallel=True,cache=True)
+def _foptrep_(value,nambus,seqs,table1,table2,nbasis,mode,data,indices,mask):
+    for i in prange(nbasis):
+        rep,sign=np.int64(i) if len(table1)==0 else table1[i],0
         for j in range(len(seqs)):
-            if bool(temp[j]&eye<<seqs[j])==nambus[j]: break
-            temp[j+1]=temp[j]|eye<<seqs[j] if nambus[j] else temp[j]&~(eye<<seqs[j])
+            if ((rep>>seqs[j])&1==1)==nambus[j]: break
+            if mode==0: sign^=_parity_(rep&((1<<seqs[j])-1))
+            rep=rep|(1<<seqs[j]) if nambus[j] else rep&~(1<<seqs[j])
         else:
-            nsign=0
-            if mode==0:
-                for j in range(len(seqs)):
-                    for k in range(seqs[j]):
-                        if temp[j]&eye<<k: nsign+=1
-            indices[ndata]=sequence(temp[-1],table)
-            data[ndata]=(-1)**nsign*value
-            ndata+=1
-    indptr[-1]=ndata
-    return data,indices,indptr
+            indices[i]=sequence(rep,table2)
+            data[i]=-value if sign else value
+            mask[i]=True
 
-@jit("Tuple((pyobject,int64[:],int64[:]))(pyobject,boolean[:],int64[:],int64[:],int64[:],int64,int64)")
-def foptrepodd(value,nambus,seqs,table1,table2,nbasis,mode):
-    ndata,data,indices,indptr=0,np.zeros(nbasis,dtype=value.dtype),np.zeros(nbasis,dtype=np.int64),np.zeros(nbasis+1,dtype=np.int64)
-    eye,temp=int(1),np.zeros(len(seqs)+1,dtype=np.int64)
-    for i in range(nbasis):
-        indptr[i]=ndata
-        temp[0]=i if len(table1)==0 else table1[i]
-        for j in range(len(seqs)):
-            if bool(temp[j]&eye<<seqs[j])==nambus[j]: break
-            temp[j+1]=temp[j]|eye<<seqs[j] if nambus[j] else temp[j]&~(eye<<seqs[j])
-        else:
-            nsign=0
-            if mode==0:
-                for j in range(len(seqs)):
-                    for k in range(seqs[j]):
-                        if temp[j]&eye<<k: nsign+=1
-            indices[ndata]=sequence(temp[-1],table2)
-            data[ndata]=(-1)**nsign*value
-            ndata+=1
-    indptr[-1]=ndata
-    return data,indices,indptr
+@jit(nopython=True,nogil=True,cache=True)
+def _parity_(rep):
+    rep^=rep>>32
+    rep^=rep>>16
+    rep^=rep>>8
+    rep^=rep>>4
+    rep^=rep>>2
+    rep^=rep>>1
+    return rep&1
@@ -17,7 +17,7 @@ from ..Operator import *
 from ..Geometry import Bond
 from .DegreeOfFreedom import *
 from .Operator import *
-from collections import Callable
+from collections.abc import Callable
 import numpy as np
 
 class Quadratic(Term):
@@ -139,9 +139,9 @@ class Quadratic(Term):
                 value=self.value*(1 if self.amplitude is None else self.amplitude(bond))
                 for fpack in self.indexpacks(bond) if isinstance(self.indexpacks,Callable) else self.indexpacks:
                     if self.mode=='pr':
-                        assert getattr(fpack,'nambus',None) in ((ANNIHILATION,ANNIHILATION),(CREATION,CREATION))
+                        assert fpack.nambus in ((ANNIHILATION,ANNIHILATION),(CREATION,CREATION))
                     else:
-                        assert not hasattr(fpack,'nambus')
+                        assert fpack.nambus is None
                     for coeff,index1,index2 in fpack.expand(bond,config[bond.spoint.pid],config[bond.epoint.pid]):
                         dagger1,dagger2=index1.replace(nambu=1-index1.nambu),index2.replace(nambu=1-index2.nambu)
                         if self.mode=='st' and index1==dagger2:
@@ -197,7 +197,7 @@ class Quadratic(Term):
             if np.abs(value)>RZERO:
                 edgr,sdgr=config[bond.epoint.pid],config[bond.spoint.pid]
                 for fpack in self.indexpacks(bond) if isinstance(self.indexpacks,Callable) else self.indexpacks:
-                    if not hasattr(fpack,'atoms') or (edgr.atom,sdgr.atom)==fpack.atoms:
+                    if fpack.atoms is None or (edgr.atom,sdgr.atom)==fpack.atoms:
                         result.append('%s%s:%s*%s'%(self.statistics,self.mode,decimaltostr(value,Term.NDECIMAL),fpack.tostr(mask=('atoms',),form='repr')))
         return '\n'.join(result)
 
@@ -576,11 +576,11 @@ class Coulomb(Term):
                 eindexpacks,sindexpacks=self.indexpacks(bond) if isinstance(self.indexpacks,Callable) else self.indexpacks
                 epacks,spacks=[],[]
                 for epack in eindexpacks:
-                    if not hasattr(epack,'atoms') or (edgr.atom,edgr.atom)==epack.atoms:
+                    if epack.atoms is None or (edgr.atom,edgr.atom)==epack.atoms:
                         epacks.append(epack.tostr(mask=('atoms',),form='repr'))
                 epacks='%s%s%s'%('(' if len(epacks)>1 else '','+'.join(epacks),')' if len(epacks)>1 else '')
                 for spack in sindexpacks:
-                    if not hasattr(spack,'atoms') or (sdgr.atom,sdgr.atom)==spack.atoms:
+                    if spack.atoms is None or (sdgr.atom,sdgr.atom)==spack.atoms:
                         spacks.append(spack.tostr(mask=('atoms',),form='repr'))
                 spacks='%s%s%s'%('(' if len(spacks)>1 else '','+'.join(spacks),')' if len(spacks)>1 else '')
                 result='%scl:%s*%s*%s'%(self.statistics,decimaltostr(value,Term.NDECIMAL),epacks,spacks)
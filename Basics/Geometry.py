@@ -15,7 +15,8 @@ __all__=[   'azimuthd','azimuth','polard','polar','volume',
             ]
 
 from .Utilities import RZERO
-from collections import namedtuple,Iterable
+from collections import namedtuple
+from functools import lru_cache
 from scipy.spatial import cKDTree
 import numpy as np
 import numpy.linalg as nl
@@ -25,48 +26,42 @@ import warnings
 
 def azimuthd(self):
     '''
-    Azimuth in degrees of an array-like vector.
+    Azimuth in degrees of an array-like vector or of a stack of array-like vectors along the last axis.
     '''
-    if self[1]>=0:
-        return np.degrees(np.arccos(self[0]/nl.norm(self[:-1] if len(self)==3 else self)))
-    else:
-        return 360-np.degrees(np.arccos(self[0]/nl.norm(self[:-1] if len(self)==3 else self)))
+    return np.degrees(azimuth(self))
 
 def azimuth(self):
     '''
-    Azimuth in radians of an array-like vector.
+    Azimuth in radians of an array-like vector or of a stack of array-like vectors along the last axis.
     '''
-    if self[1]>=0:
-        return np.arccos(self[0]/nl.norm(self[:-1] if len(self)==3 else self))
-    else:
-        return 2*np.pi-np.arccos(self[0]/nl.norm(self[:-1] if len(self)==3 else self))
+    self=np.asarray(self)
+    return np.arctan2(self[...,1],self[...,0])%(2*np.pi)
 
 def polard(self):
     '''
-    Polar angle in degrees of an array-like vector.
+    Polar angle in degrees of an array-like vector or of a stack of array-like vectors along the last axis.
     '''
-    if self.shape[0]==3:
-        return np.degrees(np.arccos(self[2]/nl.norm(self)))
-    else:
-        raise ValueError("polard error: the array-like vector must contain three elements.")
+    return np.degrees(polar(self))
 
 def polar(self):
     '''
-    Polar angle in radians of an array-like vector.
+    Polar angle in radians of an array-like vector or of a stack of array-like vectors along the last axis.
     '''
-    if self.shape[0]==3:
-        return np.arccos(self[2]/nl.norm(self))
+    self=np.asarray(self)
+    if self.shape[-1]==3:
+        return np.arctan2(np.hypot(self[...,0],self[...,1]),self[...,2])
     else:
         raise ValueError("polar error: the array-like vector must contain three elements.")
 
 def volume(O1,O2,O3):
     '''
-    Volume spanned by three array-like vectors.
+    Volume spanned by three array-like vectors or by three stacks of array-like vectors along the last axis.
     '''
-    if O1.shape[0] in [1,2] or O2.shape[0] in [1,2] or O3.shape[0] in [1,2]:
-        return 0
-    elif O1.shape[0] ==3 and O2.shape[0]==3 and O3.shape[0]==3:
-        return np.inner(O1,np.cross(O2,O3))
+    O1,O2,O3=np.asarray(O1),np.asarray(O2),np.asarray(O3)
+    if O1.shape[-1] in [1,2] or O2.shape[-1] in [1,2] or O3.shape[-1] in [1,2]:
+        return np.zeros(np.broadcast(O1[...,0],O2[...,0],O3[...,0]).shape)[()]
+    elif O1.shape[-1]==3 and O2.shape[-1]==3 and O3.shape[-1]==3:
+        return np.einsum('...i,...i->...',O1,np.cross(O2,O3))[()]
     else:
         raise ValueError("volume error: the shape of the array-like vectors is not supported.")
 
@@ -76,28 +71,22 @@ def isparallel(O1,O2):
 
     Parameters
     ----------
-    O1,O2 : 1d array-like
-        The input vectors.
+    O1,O2 : 1d/nd array-like
+        The input vectors or stacks of vectors along the last axis, which are broadcasted against each other.
 
     Returns
     -------
-    int
+    int/nd ndarray of int
         *  0: not parallel
         *  1: parallel
         * -1: anti-parallel
     '''
-    norm1=nl.norm(O1)
-    norm2=nl.norm(O2)
-    if norm1<RZERO or norm2<RZERO:
-        return 1
-    elif O1.shape[0]==O2.shape[0]:
-        buff=np.inner(O1,O2)/(norm1*norm2)
-        if np.abs(buff-1)<RZERO:
-            return 1
-        elif np.abs(buff+1)<RZERO:
-            return -1
-        else:
-            return 0
+    O1,O2=np.asarray(O1),np.asarray(O2)
+    if O1.shape[-1]==O2.shape[-1]:
+        norm1,norm2=np.einsum('...i,...i->...',O1,O1),np.einsum('...i,...i->...',O2,O2)
+        degenerate=(norm1<RZERO**2)|(norm2<RZERO**2)
+        buff=np.einsum('...i,...i->...',O1,O2)/np.sqrt(np.where(degenerate,1.0,norm1*norm2))
+        return np.where(degenerate|(np.abs(buff-1)<RZERO),1,np.where(np.abs(buff+1)<RZERO,-1,0))[()]
     else:
         raise ValueError("isparallel error: the shape of the array-like vectors does not match.")
 
@@ -231,29 +220,32 @@ def reciprocals(vectors):
     2d array-like
         The reciprocals.
     '''
+    return [np.array(reciprocal) for reciprocal in _reciprocals_(tuple(tuple(vector) for vector in vectors))]
+
+@lru_cache(maxsize=128)
+def _reciprocals_(vectors):
+    '''
+    The cached reciprocals dual to the input vectors, which are given as a tuple of tuples.
+    '''
     result=[]
     nvectors=len(vectors)
     if nvectors==0:
-        return []
+        return ()
+    vectors=np.asarray(vectors,dtype=np.float64)
     if nvectors==1:
-        result.append(np.array(vectors[0]/(nl.norm(vectors[0]))**2*2*np.pi))
+        result.append(vectors[0]/(nl.norm(vectors[0]))**2*2*np.pi)
     elif nvectors in (2,3):
-        ndim=vectors[0].shape[0]
+        ndim=vectors.shape[1]
         buff=np.zeros((3,3))
-        buff[0:ndim,0]=vectors[0]
-        buff[0:ndim,1]=vectors[1]
-        if nvectors==2:
-            buff[(2 if ndim==2 else 0):3,2]=np.cross(vectors[0],vectors[1])
-        else:
-            buff[0:ndim,2]=vectors[2]
-        buff=nl.inv(buff)
-        result.append(np.array(buff[0,0:ndim]*2*np.pi))
-        result.append(np.array(buff[1,0:ndim]*2*np.pi))
-        if nvectors==3:
-            result.append(np.array(buff[2,0:ndim]*2*np.pi))
+        buff[0:nvectors,0:ndim]=vectors
+        if nvectors==2: buff[2,:]=np.cross(buff[0],buff[1])
+        buff=np.cross(buff[[1,2,0]],buff[[2,0,1]])
+        buff*=2*np.pi/np.inner(vectors[0],buff[0,0:ndim])
+        for i in range(nvectors):
+            result.append(buff[i,0:ndim])
     else:
         raise ValueError('Reciprocals error: the number of translation vectors should not be greater than 3.')
-    return result
+    return tuple(result)
 
 def translation(cluster,vector):
     '''
@@ -296,7 +288,7 @@ def rotation(cluster,angle=0,center=None):
     m=np.array([[m11,m12],[m21,m22]])
     return [m.dot(np.asarray(coord)-np.asarray(center))+np.asarray(center) for coord in cluster]
 
-def tiling(cluster,vectors=(),translations=()):
+def tiling(cluster,vectors=(),translations=(),asarray=False):
     '''
     Tile a supercluster by translations of the input cluster.
 
@@ -308,19 +300,19 @@ def tiling(cluster,vectors=(),translations=()):
         The translation vectors.
     translations : iterator of tuple, optional
         The translations of the cluster.
+    asarray : logical, optional
+        True for returning the supercluster as a 2d ndarray and False for a list of 1d ndarray.
 
     Returns
     -------
-    list of 1d ndarray
+    list of 1d ndarray/2d ndarray
         The supercluster tiled from the translations of the input cluster.
     '''
-    supercluster=[]
-    if len(vectors)==0: vectors,translations=0,(0,)
-    for translation in translations:
-        disp=np.dot(tuple(translation) if isinstance(translation,Iterable) else (translation,),vectors)
-        for coord in cluster:
-            supercluster.append(coord+disp)
-    return supercluster
+    if len(cluster)==0: return np.array([]) if asarray else []
+    cluster=np.asarray(cluster)
+    disps=np.dot(np.asarray(translations if isinstance(translations,np.ndarray) else list(translations)).reshape((-1,len(vectors))),vectors) if len(vectors)>0 else np.zeros((1,cluster.shape[1]))
+    result=(disps[:,np.newaxis,:]+cluster[np.newaxis,:,:]).reshape((-1,cluster.shape[1]))
+    return result if asarray else list(result)
 
 class PID(namedtuple('PID',['scope','site'])):
     '''
@@ -349,6 +341,7 @@ class Point(object):
     icoord : 1d ndarray
         The point icoord.
     '''
+    __slots__=('pid','rcoord','icoord')
 
     def __init__(self,pid,rcoord,icoord=None):
         '''
@@ -365,8 +358,8 @@ class Point(object):
         '''
         assert isinstance(pid,PID)
         self.pid=pid
-        self.rcoord=np.asarray(rcoord)
-        self.icoord=np.zeros(self.rcoord.shape) if icoord is None else np.asarray(icoord)
+        self.rcoord=rcoord if type(rcoord) is np.ndarray else np.asarray(rcoord)
+        self.icoord=np.zeros(self.rcoord.shape) if icoord is None else icoord if type(icoord) is np.ndarray else np.asarray(icoord)
 
     def __str__(self):
         '''
@@ -384,7 +377,9 @@ class Point(object):
         '''
         Overloaded operator(==).
         '''
-        return self.pid==other.pid and np.allclose(self.rcoord,other.rcoord) and np.allclose(self.icoord,other.icoord)
+        if self is other: return True
+        if self.pid!=other.pid: return False
+        return (np.abs(self.rcoord-other.rcoord)<=1e-8+1e-5*np.abs(other.rcoord)).all() and (np.abs(self.icoord-other.icoord)<=1e-8+1e-5*np.abs(other.icoord)).all()
     
     def __ne__(self,other):
         '''
@@ -404,7 +399,12 @@ class Bond(object):
         The start point of the bond.
     epoint : Point
         The end point of the bond.
+    rcoord : 1d ndarray
+        The real coordinate of the bond.
+    icoord : 1d ndarray
+        The lattice coordinate of the bond.
     '''
+    __slots__=('neighbour','spoint','epoint','rcoord','icoord')
 
     def __init__(self,neighbour,spoint,epoint):
         '''
@@ -422,35 +422,20 @@ class Bond(object):
         self.neighbour=neighbour
         self.spoint=spoint
         self.epoint=epoint
+        self.rcoord=epoint.rcoord-spoint.rcoord
+        self.icoord=epoint.icoord-spoint.icoord
 
     def __repr__(self):
         '''
         Convert an instance to string.
         '''
         return 'Bond(%s, %s, %s)'%(self.neighbour,self.spoint,self.epoint)
-    
-    @property
-    def rcoord(self):
-        '''
-        The real coordinate of a bond.
-        '''
-        return self.epoint.rcoord-self.spoint.rcoord
-    
-    @property
-    def icoord(self):
-        '''
-        The lattice coordinate of a bond.
-        '''
-        return self.epoint.icoord-self.spoint.icoord
-    
+
     def isintracell(self):
         '''
         Judge whether a bond is intra the unit cell or not. 
         '''
-        if np.allclose(self.icoord,0.0):
-            return True
-        else:
-            return False
+        return (np.abs(self.icoord)<=1e-8).all()
 
     @property
     def reversed(self):
@@ -501,6 +486,23 @@ class Link(object):
         '''
         return 'Link(%s, %s, %s, %s)'%(self.neighbour,self.sindex,self.eindex,self.disp)
 
+def _translations_(maxtranslations):
+    '''
+    The translations of a cluster up to the maximum ones along each vector, with only one of each pair of opposite translations kept and sorted by their lengths.
+    '''
+    if len(maxtranslations)==0: return np.zeros((1,0),dtype=np.int64)
+    maxtranslations=np.asarray(maxtranslations,dtype=np.int64)
+    result=np.indices(2*maxtranslations+1).reshape((len(maxtranslations),-1)).T-maxtranslations
+    result=result[:len(result)//2+1]
+    return result[np.argsort(nl.norm(result,axis=1),kind='stable')]
+
+def _kdtree_(coords):
+    '''
+    The kd-tree of a set of coordinates, built unbalanced and uncompacted for small sets where the construction dominates.
+    '''
+    coords=np.asarray(coords)
+    return cKDTree(coords,balanced_tree=False,compact_nodes=False) if len(coords)<1000 else cKDTree(coords)
+
 def minimumlengths(cluster,vectors=(),nneighbour=1,zmax=8):
     '''
     This function searches the minimum bond lengths of a cluster.
@@ -524,23 +526,28 @@ def minimumlengths(cluster,vectors=(),nneighbour=1,zmax=8):
     assert nneighbour>=0
     result=np.array([np.inf]*(nneighbour+1))
     if len(cluster)>0:
-        translations=list(it.product(*([range(-nneighbour,nneighbour+1)]*len(vectors))))
-        for translation in translations:
-            if any(translation): translations.remove(tuple([-i for i in translation]))
-        translations=sorted(translations,key=nl.norm)
-        supercluster=tiling(cluster,vectors=vectors,translations=translations)
-        for length in cKDTree(supercluster).query(cluster,k=nneighbour*zmax if nneighbour>0 else 1)[0].flatten():
-            for i,minlength in enumerate(result):
-                if np.allclose(length,minlength):
-                    break
-                elif length<minlength:
-                    if nneighbour>0: result[i+1:nneighbour+1]=result[i:nneighbour]
-                    result[i]=length
-                    break
+        supercluster=tiling(cluster,vectors=vectors,translations=_translations_([nneighbour]*len(vectors)),asarray=True)
+        lengths=_kdtree_(supercluster).query(np.asarray(cluster),k=nneighbour*zmax if nneighbour>0 else 1,workers=-1)[0].ravel()
+        permutation=np.argsort(lengths,kind='stable')
+        starts=np.flatnonzero(np.concatenate(([True],~np.isclose(lengths[permutation[1:]],lengths[permutation[:-1]]))))
+        lengths=lengths[np.minimum.reduceat(permutation,starts)][:nneighbour+1]
+        result[:len(lengths)]=lengths
         if np.any(result==np.inf):
             warnings.warn('minimumlengths warning: np.inf remained in the result. Larger(>%s) zmax may be needed.'%zmax)
     return result
 
+def _pairs_(tree1,tree2,neighbours,upper=False):
+    '''
+    The neighbour-classified pairs of points between two kd-trees, in the lexicographic order of the pair indices.
+    '''
+    names,lengths=list(neighbours.keys()),np.array(list(neighbours.values()))
+    smatrix=tree1.sparse_distance_matrix(tree2,np.max(lengths)+RZERO,output_type='ndarray')
+    if upper: smatrix=smatrix[smatrix['i']<=smatrix['j']]
+    smatrix=smatrix[np.lexsort((smatrix['j'],smatrix['i']))]
+    matches=np.abs(smatrix['v'][:,np.newaxis]-lengths[np.newaxis,:])<RZERO
+    mask=matches.any(axis=1)
+    return [(names[n],i,j) for n,i,j in zip(matches.argmax(axis=1)[mask].tolist(),smatrix['i'][mask].tolist(),smatrix['j'][mask].tolist())]
+
 def intralinks(cluster,vectors=(),maxtranslations=None,neighbours=None):
     '''
     This function searches a certain set of neighbours intra a cluster.
@@ -570,19 +577,11 @@ def intralinks(cluster,vectors=(),maxtranslations=None,neighbours=None):
         if maxtranslations is None: maxtranslations=[len(neighbours)-1]*len(vectors)
         if neighbours is None: neighbours={0:0.0}
         assert len(maxtranslations)==len(vectors)
-        translations=list(it.product(*[range(-nnb,nnb+1) for nnb in maxtranslations]))
-        for translation in translations:
-            if any(translation): translations.remove(tuple([-i for i in translation]))
-        translations=sorted(translations,key=nl.norm)
-        supercluster=tiling(cluster,vectors=vectors,translations=translations)
-        disps=tiling([np.zeros(len(next(iter(cluster))))]*len(cluster),vectors=vectors,translations=translations)
-        smatrix=cKDTree(cluster).sparse_distance_matrix(cKDTree(supercluster),np.max(list(neighbours.values()))+RZERO)
-        for (i,j),dist in smatrix.items():
-            if i<=j:
-                for neighbour,length in neighbours.items():
-                    if abs(length-dist)<RZERO:
-                        result.append(Link(neighbour,sindex=i,eindex=j%len(cluster),disp=disps[j]))
-                        break
+        translations=_translations_(maxtranslations)
+        supercluster=tiling(cluster,vectors=vectors,translations=translations,asarray=True)
+        disps=np.repeat(np.dot(translations,vectors) if len(vectors)>0 else np.zeros((1,len(next(iter(cluster))))),len(cluster),axis=0)
+        for neighbour,i,j in _pairs_(_kdtree_(cluster),_kdtree_(supercluster),neighbours,upper=True):
+            result.append(Link(neighbour,sindex=i,eindex=j%len(cluster),disp=disps[j]))
     return result
 
 def interlinks(cluster1,cluster2,neighbours=None):
@@ -604,14 +603,22 @@ def interlinks(cluster1,cluster2,neighbours=None):
     result=[]
     if len(cluster1)>0 and len(cluster2)>0:
         if neighbours is None: neighbours={0:0.0}
-        smatrix=cKDTree(cluster1).sparse_distance_matrix(cKDTree(cluster2),np.max(list(neighbours.values()))+RZERO)
-        for (i,j),dist in smatrix.items():
-            for neighbour,length in neighbours.items():
-                if abs(length-dist)<RZERO:
-                    result.append(Link(neighbour,sindex=i,eindex=j,disp=0))
-                    break
+        for neighbour,i,j in _pairs_(_kdtree_(cluster1),_kdtree_(cluster2),neighbours):
+            result.append(Link(neighbour,sindex=i,eindex=j,disp=0))
     return result
 
+def _bonds_(lattice1,lattice2,links):
+    '''
+    The bonds corresponding to the links from the points of a lattice to those of another.
+    '''
+    if len(links)==0: return []
+    sindices,eindices=[link.sindex for link in links],[link.eindex for link in links]
+    disps=np.asarray([link.disp for link in links])
+    if disps.ndim==1: disps=disps[:,np.newaxis]
+    spoints={index:Point(lattice1.pids[index],lattice1.rcoords[index],lattice1.icoords[index]) for index in set(sindices)}
+    ercoords,eicoords=lattice2.rcoords[eindices]+disps,lattice2.icoords[eindices]+disps
+    return [Bond(link.neighbour,spoints[link.sindex],Point(lattice2.pids[link.eindex],erc,eic)) for link,erc,eic in zip(links,ercoords,eicoords)]
+
 class Lattice(object):
     '''
     This class provides a unified description of 1d, quasi 1d, 2D, quasi 2D and 3D lattice systems.
@@ -655,9 +662,9 @@ class Lattice(object):
             * When int, the order of neighbours of the lattice.
             * When dict, the neighbour-length map of the lattice.
         '''
-        rcoords=np.asarray(rcoords)
+        rcoords=np.ascontiguousarray(rcoords)
+        icoords=np.zeros(rcoords.shape) if icoords is None else np.ascontiguousarray(icoords)
         if pids is None: pids=[PID(scope=name,site=i) for i in range(len(rcoords))]
-        if icoords is None: icoords=np.zeros(rcoords.shape)
         assert len(pids)==len(rcoords)==len(icoords)
         self.name=name
         self.pids=pids
@@ -759,12 +766,7 @@ class Lattice(object):
         '''
         The bonds of the lattice.
         '''
-        result=[]
-        for link in intralinks(self.rcoords,vectors=self.vectors,neighbours=self.neighbours):
-            spoint=Point(pid=self.pids[link.sindex],rcoord=self.rcoords[link.sindex],icoord=self.icoords[link.sindex])
-            epoint=Point(pid=self.pids[link.eindex],rcoord=self.rcoords[link.eindex]+link.disp,icoord=self.icoords[link.eindex]+link.disp)
-            result.append(Bond(link.neighbour,spoint,epoint))
-        return result
+        return _bonds_(self,self,intralinks(self.rcoords,vectors=self.vectors,neighbours=self.neighbours))
 
     def sublattice(self,name,subset):
         '''
@@ -945,10 +947,7 @@ class SuperLattice(Lattice):
         '''
         result=[bond for lattice in self.sublattices for bond in lattice.bonds]
         for sub1,sub2 in it.combinations(self.sublattices,2):
-            for link in interlinks(sub1.rcoords,sub2.rcoords,neighbours=self.neighbours):
-                spoint=Point(pid=sub1.pids[link.sindex],rcoord=sub1.rcoords[link.sindex],icoord=sub1.icoords[link.sindex])
-                epoint=Point(pid=sub2.pids[link.eindex],rcoord=sub2.rcoords[link.eindex]+link.disp,icoord=sub2.icoords[link.eindex]+link.disp)
-                result.append(Bond(link.neighbour,spoint,epoint))
+            result.extend(_bonds_(sub1,sub2,interlinks(sub1.rcoords,sub2.rcoords,neighbours=self.neighbours)))
         return result
 
 class Cylinder(Lattice):
@@ -45,6 +45,7 @@ class Arithmetic(object):
         * The minus sign ('-' in the negative operator and subtraction operator) are interpreted as the multiplication by -1.0
         * The division operation is interpreted as the multiplication by the inverse of the second argument, which should be a scalar.
     '''
+    __slots__=()
 
     def __pos__(self):
         '''
@@ -895,7 +896,7 @@ def decimaltostr(number,n=5):
 
     Parameters
     ----------
-    number : int/long/float/complex
+    number : int/float/complex
         The number to be converted to string.
     n : int, optional
         The number of decimal fraction to be kept.
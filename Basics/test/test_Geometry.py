@@ -1,5 +1,5 @@
 '''
-Geometry test (16 tests in total).
+Geometry test (19 tests in total).
 '''
 
 __all__=['geometry']
@@ -26,12 +26,30 @@ class TestFunctions(TestCase):
         a,b,c=np.array([1.0,-1.0,0.0]),np.array([1.0,1.0,0.0]),np.array([0.0,0.0,1.0])
         self.assertEqual(volume(a,b,c),2.0)
 
+    def test_stackedvolume(self):
+        O1,O2,O3=np.random.random((5,3)),np.random.random((5,3)),np.random.random((5,3))
+        result=volume(O1,O2,O3)
+        self.assertEqual(result.shape,(5,))
+        self.assertTrue(np.allclose(result,[volume(o1,o2,o3) for o1,o2,o3 in zip(O1,O2,O3)]))
+        self.assertTrue(np.allclose(volume(O1,O2,O3[0]),[volume(o1,o2,O3[0]) for o1,o2 in zip(O1,O2)]))
+        self.assertEqual(volume(O1[:,:2],O2[:,:2],O3[:,:2]).shape,(5,))
+
     def test_isparallel(self):
         a,b=np.array([1.0,-1.0,0.0]),np.array([1.0,1.0,0.0])
         self.assertEqual(isparallel(a,b),0)
         self.assertEqual(isparallel(a+b,a+b),+1)
         self.assertEqual(isparallel(a-b,b-a),-1)
 
+    def test_stackedisparallel(self):
+        O1=np.concatenate([np.random.random((6,3)),[[1.0,-1.0,0.0],[0.0,0.0,0.0],[1.0,2.0,3.0]]])
+        O2=np.concatenate([np.random.random((6,3)),[[-2.0,2.0,0.0],[1.0,1.0,0.0],[0.5,1.0,1.5]]])
+        O2[:2]=O1[:2]*np.array([[2.0],[-3.0]])
+        result=isparallel(O1,O2)
+        self.assertEqual(result.shape,(9,))
+        self.assertEqual(list(result),[isparallel(o1,o2) for o1,o2 in zip(O1,O2)])
+        self.assertEqual(list(result[[0,1,6,7,8]]),[1,-1,-1,1,1])
+        self.assertEqual(list(isparallel(O1,O1[0])),[isparallel(o1,O1[0]) for o1 in O1])
+
     def test_issubordinate(self):
         e,f1,f2=np.array([1.0,1.0]),np.array([1.0,0.0]),np.array([0.0,1.0])
         self.assertTrue(issubordinate(e,[f1,f2]))
@@ -44,6 +62,15 @@ class TestFunctions(TestCase):
         for i,coord in enumerate(supercluster):
             self.assertEqual(nl.norm(a1*(i//n)+a2*(i%n)-coord),0.0)
 
+    def test_tilingarray(self):
+        cluster,vectors=[np.array([0.0,0.0]),np.array([0.5,0.5])],[np.array([1.0,0.0]),np.array([0.0,1.0])]
+        supercluster=tiling(cluster=cluster,vectors=vectors,translations=it.product(range(3),range(4)),asarray=True)
+        self.assertIsInstance(supercluster,np.ndarray)
+        self.assertEqual(supercluster.shape,(24,2))
+        self.assertTrue(np.array_equal(supercluster,np.asarray(tiling(cluster=cluster,vectors=vectors,translations=it.product(range(3),range(4))))))
+        self.assertIsInstance(tiling(cluster=cluster,vectors=vectors,translations=it.product(range(3),range(4))),list)
+        self.assertEqual(tiling(cluster=[],asarray=True).shape,(0,))
+
     def test_minimumlengths(self):
         point,a1,a2=np.array([0.0,0.0]),np.array([1.0,0.0]),np.array([0.0,1.0])
         lengths=minimumlengths(cluster=[point],vectors=[a1,a2],nneighbour=3)
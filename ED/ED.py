@@ -17,6 +17,7 @@ import HamiltonianPy as HP
 import HamiltonianPy.Misc as HM
 import matplotlib.pyplot as plt
 import os,sys,time
+from numba import jit
 from mpi4py import MPI
 
 class ED(HP.Engine):
@@ -369,14 +370,7 @@ class BGF(object):
         '''
         t0=time.time()
         if self.method=='S' and (np is None or np<=0):
-            vecs,Qs=self.controllers['vecs'],self.controllers['Qs']
-            for i,lanczos in enumerate(self.controllers['lczs']):
-                ts=time.time()
-                while lanczos.niter<lanczos.maxiter and not lanczos.stop:
-                    lanczos.iter()
-                    if lanczos.niter>0: Qs[i,:,lanczos.niter-1]=vecs.dot(lanczos.vectors[lanczos.niter-1])
-                te=time.time()
-                if log: log<<'%s%s%s'%('\b'*30 if i>0 else '',('%s/%s(%.2es/%.3es)'%(i+1,len(Qs),te-ts,te-t0)).center(30),'\b'*30 if i==len(Qs)-1 else '')
+            self._lockstep_(log)
         elif self.method=='B':
             lanczos=self.controllers['lanczos']
             for i in range(lanczos.maxiter):
@@ -409,6 +403,45 @@ class BGF(object):
         else:
             raise ValueError('BGF iter error: not supported.')
 
+    def _lockstep_(self,log=None):
+        '''
+        Advance the simple Lanczos sequences of all the operators in lockstep, so that each step costs one sparse matrix-matrix product instead of one sparse matrix-vector product per operator.
+
+        Parameters
+        ----------
+        log : Log, optional
+            The log file to record the iteration information.
+        '''
+        t0=time.time()
+        matrix,vecs,Qs,lczs=self.controllers['matrix'].tocsr(),self.controllers['vecs'],self.controllers['Qs'],self.controllers['lczs']
+        indices=np.arange(len(lczs))
+        W=np.ascontiguousarray(np.array([lanczos.candidates[0] for lanczos in lczs]).T,dtype=np.result_type(matrix.dtype,vecs.dtype))
+        Vp,norms=W,np.linalg.norm(W,axis=0)
+        for n in range(Qs.shape[2]):
+            ts=time.time()
+            mask=norms>lczs[0].dtol
+            if not mask.all():
+                for index in indices[~mask]: lczs[index].stop=True
+                indices,W,Vp,norms=indices[mask],W[:,mask],Vp[:,mask],norms[mask]
+                if len(indices)==0: break
+            V=W/norms
+            W,overlaps,betas,norms=matrix.dot(V),np.zeros(len(indices),dtype=W.dtype),norms,np.zeros(len(indices))
+            _lczorth_(V,Vp,betas if n>0 else np.zeros(len(indices)),W,overlaps,norms)
+            Q=vecs.dot(V)
+            for k,index in enumerate(indices):
+                lanczos=lczs[index]
+                if n>0:
+                    lanczos._T_[n,n-1]=betas[k]
+                    lanczos._T_[n-1,n]=np.conjugate(lanczos._T_[n,n-1])
+                else:
+                    lanczos.P[0,0]=betas[k]
+                lanczos._T_[n,n]=np.conjugate(overlaps[k])
+                lanczos.niter=n+1
+                Qs[index,:,n]=Q[:,k]
+            Vp=V
+            te=time.time()
+            if log: log<<'%s%s%s'%('\b'*30 if n>0 else '',('%s/%s(%.2es/%.3es)'%(n+1,Qs.shape[2],te-ts,te-t0)).center(30),'\b'*30 if n==Qs.shape[2]-1 else '')
+
     def set(self,gse):
         '''
         Set the Lambda matrix, Q matrix and QT matrix of the block.
@@ -427,7 +460,7 @@ class BGF(object):
             self.data['QTs']=np.zeros((Qs.shape[0],Qs.shape[2]),dtype=Qs.dtype)
             for i,(lcz,Q) in enumerate(zip(lczs,Qs)):
                 if lcz.niter>0:
-                    E,V=sl.eigh(lcz.T,eigvals_only=False)
+                    E,V=sl.eigh_tridiagonal(np.diagonal(lcz.T).real,np.diagonal(lcz.T,offset=-1).real)
                     self.data['niters'][i]=lcz.niter
                     self.data['Lambdas'][i,0:lcz.niter]=sign*(E-gse)
                     self.data['Qs'][i,:,0:lcz.niter]=Q[:,0:lcz.niter].dot(V)
@@ -461,13 +494,47 @@ class BGF(object):
         '''
         if self.method=='S':
             niters,Lambdas,Qs,QTs=self.data['niters'],self.data['Lambdas'],self.data['Qs'],self.data['QTs']
-            result=np.zeros((Lambdas.shape[0],Lambdas.shape[0]),dtype=np.complex128)
-            for i in range(Lambdas.shape[0]):
-                result[i,:]=(Qs[i,:,0:niters[i]]/(omega-Lambdas[i,0:niters[i]])[np.newaxis,:]).dot(QTs[i,0:niters[i]])
-            return result
+            if 'weights' not in self.data: self.data['weights'],self.data['mask']=np.zeros(QTs.shape,dtype=np.complex128),np.arange(Lambdas.shape[1])<niters[:,np.newaxis]
+            weights=self.data['weights']
+            np.divide(QTs,omega-Lambdas,out=weights,where=self.data['mask'],dtype=np.complex128)
+            return np.matmul(Qs,weights[:,:,np.newaxis])[:,:,0]
         else:
             return (self.data['Q']/(omega-self.data['Lambda'])[np.newaxis,:]).dot(self.data['QT'])
 
+    def trace(self,omegas):
+        '''
+        The traces of the block of the Green's function at a batch of frequencies.
+
+        Parameters
+        ----------
+        omegas : 1d ndarray
+            The frequencies.
+
+        Returns
+        -------
+        1d ndarray
+            The traces of the block.
+        '''
+        if self.method=='S':
+            niters,Lambdas,Qs,QTs=self.data['niters'],self.data['Lambdas'],self.data['Qs'],self.data['QTs']
+            mask=np.arange(Lambdas.shape[1])<niters[:,np.newaxis]
+            weights,poles=(np.einsum('iin->in',Qs)*QTs)[mask],Lambdas[mask]
+        else:
+            weights,poles=np.einsum('in,ni->n',self.data['Q'],self.data['QT']),self.data['Lambda']
+        return (weights[np.newaxis,:]/(np.asarray(omegas)[:,np.newaxis]-poles[np.newaxis,:])).sum(axis=1)
+
+@jit(nopython=True,nogil=True,cache=True)
+def _lczorth_(V,Vp,betas,W,overlaps,norms):
+    for i in range(V.shape[0]):
+        for j in range(V.shape[1]):
+            W[i,j]-=betas[j]*Vp[i,j]
+            overlaps[j]+=V[i,j].conjugate()*W[i,j]
+    for i in range(V.shape[0]):
+        for j in range(V.shape[1]):
+            W[i,j]-=overlaps[j]*V[i,j]
+            norms[j]+=W[i,j].real**2+W[i,j].imag**2
+    for j in range(len(norms)): norms[j]=np.sqrt(norms[j])
+
 class GF(HP.GF):
     '''
     Zero-temperature Green's function.
@@ -478,6 +545,8 @@ class GF(HP.GF):
         The function that generates the blocks of the Green's function.
     compose : callable
         The function that composes the Green's function from its blocks.
+    trace : callable
+        The function that evaluates the trace of the Green's function from its blocks over a batch of frequencies.
     v0 : 1d ndarray
         The initial guess of the groundstate.
     nstep : int
@@ -488,7 +557,7 @@ class GF(HP.GF):
         The blocks of the Green's function.
     '''
 
-    def __init__(self,generate,compose,v0=None,nstep=200,method='S',**karg):
+    def __init__(self,generate,compose,trace=None,v0=None,nstep=200,method='S',**karg):
         '''
         Constructor.
 
@@ -498,6 +567,8 @@ class GF(HP.GF):
             The function that generates the blocks of the Green's function.
         compose : callable
             The function that composes the Green's function from its blocks.
+        trace : callable, optional
+            The function that evaluates the trace of the Green's function from its blocks over a batch of frequencies. If it is None, the Green's function is composed at every frequency.
         v0 : 1d ndarray, optional
             The initial guess of the groundstate.
         nstep : int, optional
@@ -508,6 +579,7 @@ class GF(HP.GF):
         super(GF,self).__init__(**karg)
         self.generate=generate
         self.compose=compose
+        self.trace=trace
         self.v0=v0
         self.nstep=nstep
         self.method=method
@@ -559,8 +631,8 @@ def EDGFP(engine,app):
     engine.log<<'%s\n%s\n'%(info.rowtostr('Summary'),info.frame())
     if app.savedata:
         with open('%s/%s_coeff.dat'%(engine.din,engine.tostr(ndecimal=14)),'wb') as fout:
-            pk.dump(app.gse,fout,2)
-            pk.dump(app.blocks,fout,2)
+            pk.dump(app.gse,fout,pk.HIGHEST_PROTOCOL)
+            pk.dump(app.blocks,fout,pk.HIGHEST_PROTOCOL)
 
 def EDGF(engine,app):
     '''
@@ -579,13 +651,16 @@ def EDDOS(engine,app):
     engine.rundependences(app.name)
     erange=np.linspace(app.emin,app.emax,num=app.ne)
     gf=engine.apps[app.dependences[0]]
-    gf_mesh=np.zeros((app.ne,gf.nopt,gf.nopt),dtype=gf.dtype)
-    for i,omega in enumerate(erange+app.mu+1j*app.eta):
-        gf.omega=omega
-        gf_mesh[i,:,:]=gf.run(engine,gf)
+    if gf.trace is None:
+        traces=np.zeros(app.ne,dtype=np.complex128)
+        for i,omega in enumerate(erange+app.mu+1j*app.eta):
+            gf.omega=omega
+            traces[i]=np.trace(gf.run(engine,gf))
+    else:
+        traces=gf.trace(gf.blocks,erange+app.mu+1j*app.eta)
     result=np.zeros((app.ne,2))
     result[:,0]=erange
-    result[:,1]=-2*np.trace(gf_mesh,axis1=1,axis2=2).imag
+    result[:,1]=-2*traces.imag
     name='%s_%s'%(engine,app.name)
     if app.savedata: np.savetxt('%s/%s.dat'%(engine.dout,name),result)
     if app.plot: app.figure('L',result,'%s/%s'%(engine.dout,name))
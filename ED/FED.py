@@ -5,13 +5,12 @@ Fermionic/Hard-core-bosonic exact diagonalization
 
 Exact diagonalization for fermionic/hard-core-bosonic systems, including:
     * classes: FED
-    * functions: fedspgen, fedspcom, FGF
+    * functions: fedspgen, fedspcom, fedsptrace, FGF
 '''
 
-__all__=['FED','fedspgen','fedspcom','FGF']
+__all__=['FED','fedspgen','fedspcom','fedsptrace','FGF']
 
 from .ED import *
-from copy import deepcopy
 from collections import OrderedDict
 import HamiltonianPy as HP
 import HamiltonianPy.Misc as HM
@@ -200,8 +199,26 @@ def fedspcom(blocks,omega):
         gfup,indsup=blocks[2].gf(omega).T+blocks[3].gf(omega),blocks[2].indices
         return HM.reorder(HM.blockdiag(gfdw,gfup),axes=[0,1],permutation=np.argsort(np.concatenate((indsdw,indsup))))
 
+def fedsptrace(blocks,omegas):
+    '''
+    This function evaluates the trace of the zero-temperature single-particle Green's function of a fermionic/hard-core-bosonic system from its blocks.
+
+    Parameters
+    ----------
+    blocks : list of BGF
+        The blocks of the Green's function.
+    omegas : 1d ndarray
+        The frequencies.
+
+    Returns
+    -------
+    1d ndarray
+        The traces of the Green's function.
+    '''
+    return sum(block.trace(omegas) for block in blocks)
+
 def FGF(**karg):
     '''
     The zero-temperature single-particle Green's functions.
     '''
-    return GF(generate=fedspgen,compose=fedspcom,**karg)
+    return GF(generate=fedspgen,compose=fedspcom,trace=fedsptrace,**karg)
@@ -1,5 +1,5 @@
 '''
-FED test (1 test in total).
+FED test (3 tests in total).
 '''
 
 __all__=['fed']
@@ -32,6 +32,39 @@ class TestFED(TestCase):
         fed.register(DOS(name='DOS-2',parameters={'U':8.0},mu=4.0,emin=-10,emax=10,ne=501,eta=0.05,savedata=False,run=EDDOS,dependences=['GF']))
         fed.summary()
 
+    def test_dos(self):
+        print()
+        t,U,m,n=-1.0,4.0,2,2
+        basis=FBasis(2*m*n,m*n,0.0)
+        lattice=Square('S1')('%sO-%sO'%(m,n))
+        config=IDFConfig(priority=DEFAULT_FERMIONIC_PRIORITY,pids=lattice.pids,map=lambda pid: Fock(atom=0,norbital=1,nspin=2,nnambu=1))
+        fed=FED(name='WG-%s-%r'%(lattice.name,basis),sectors=[basis],lattice=lattice,config=config,terms=[Hopping('t',t,neighbour=1),Hubbard('U',U)],dtype=np.float64)
+        gf=FGF(name='GF',method='S',operators=fspoperators(config.table(),lattice),nstep=50,savedata=False,np=None,prepare=EDGFP,run=EDGF)
+        fed.add(gf)
+        dos=DOS(name='DOS',mu=U/2,emin=-6,emax=6,ne=61,eta=0.1,savedata=False,plot=False,returndata=True,run=EDDOS,dependences=['GF'])
+        fed.add(dos)
+        result=EDDOS(fed,dos)
+        traces=[]
+        for omega in result[:,0]+dos.mu+1j*dos.eta:
+            gf.omega=omega
+            traces.append(np.trace(gf.run(fed,gf)))
+        self.assertTrue(np.allclose(result[:,1],-2*np.asarray(traces).imag,rtol=1e-10,atol=1e-10))
+        gf.trace=None
+        self.assertTrue(np.allclose(EDDOS(fed,dos),result,rtol=1e-10,atol=1e-10))
+
+    def test_trace(self):
+        print()
+        t,U,m,n=-1.0,4.0,2,2
+        basis=FBasis(2*m*n,m*n,0.0)
+        lattice=Square('S1')('%sO-%sO'%(m,n))
+        config=IDFConfig(priority=DEFAULT_FERMIONIC_PRIORITY,pids=lattice.pids,map=lambda pid: Fock(atom=0,norbital=1,nspin=2,nnambu=1))
+        fed=FED(name='WG-%s-%r'%(lattice.name,basis),sectors=[basis],lattice=lattice,config=config,terms=[Hopping('t',t,neighbour=1),Hubbard('U',U)],dtype=np.float64)
+        omegas=np.linspace(-6,6,13)+U/2+0.1j
+        gf=FGF(name='GF',method='S',operators=fspoperators(config.table(),lattice),nstep=50,savedata=False,np=None,prepare=EDGFP,run=EDGF)
+        EDGFP(fed,gf)
+        for block in gf.blocks:
+            self.assertTrue(np.allclose(block.trace(omegas),[np.trace(block.gf(omega)) for omega in omegas],rtol=1e-10,atol=1e-10))
+
 fed=TestSuite([
             TestLoader().loadTestsFromTestCase(TestFED),
             ])
@@ -10,7 +10,7 @@ Floquet algorithm, including:
 
 __all__=['FLQT','QEB','FLQTQEB']
 
-from numpy import *
+from numpy import angle,array,complex128,dot,eye,savetxt,zeros
 from .TBA import *
 from scipy.linalg import expm,eig
 import itertools as it
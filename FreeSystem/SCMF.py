@@ -9,13 +9,13 @@ Self-consistent mean field theory for fermionic systems, including:
 
 __all__=['OP','SCMF']
 
-from numpy import *
+from numpy import array,asarray,complex128,conjugate,einsum,exp,float32,float64,sum,zeros
+from numpy.linalg import eigh
 from ..Basics import RZERO,Generator,Timers,Sheet
 from .TBA import *
 from copy import deepcopy
 from collections import OrderedDict
 from scipy.optimize import broyden2
-from scipy.linalg import eigh
 import itertools as it
 
 class OP(object):
@@ -72,7 +72,7 @@ class SCMF(TBA):
         The timer to record the consumed time of the iteration.
     '''
 
-    def __init__(self,filling=0.5,temperature=0,lattice=None,config=None,terms=(),orders=(),mask=('nambu',),**karg):
+    def __init__(self,filling=0.5,temperature=0,lattice=None,config=None,terms=(),orders=(),mask=('nambu',),dtype=complex128,**karg):
         '''
         Constructor.
 
@@ -92,6 +92,8 @@ class SCMF(TBA):
             The terms representing the order parameters of the system.
         mask : ['nambu'] or [], optional
             ['nambu'] for not using the nambu space and [] for using the nambu space.
+        dtype : float32, float64, complex64, complex128, optional
+            The data type of the matrix representation of the Hamiltonian.
         '''
         self.filling=filling
         self.temperature=temperature
@@ -101,9 +103,11 @@ class SCMF(TBA):
         self.terms=terms
         self.orders=orders
         self.mask=mask
+        self.dtype=dtype
         self.parameters.update({'filling':filling,'temperature':temperature})
         self.parameters.update(OrderedDict((term.id,term.value) for term in it.chain(terms if self.map is None else (),orders)))
-        self.generator=Generator(bonds=lattice.bonds,config=config,table=config.table(mask=mask),terms=terms+orders,half=True)
+        self.generator=Generator(bonds=lattice.bonds,config=config,table=config.table(mask=mask),terms=terms+orders,dtype=dtype,half=True)
+        self._arrays_=None
         self.ops=OrderedDict()
         for order in self.orders:
             m=zeros((self.nmatrix,self.nmatrix),dtype=complex128)
@@ -125,12 +129,9 @@ class SCMF(TBA):
         '''
         self.update(**{name:order.value for name,order in self.ops.items()})
         self.mu,nmatrix=super(SCMF,self).mu(self.filling,kspace),self.nmatrix
-        f=(lambda e,mu: 1 if e<=mu else 0) if abs(self.temperature)<RZERO else (lambda e,mu: 1/(exp((e-mu)/self.temperature)+1))
-        m=zeros((nmatrix,nmatrix),dtype=complex128)
-        for matrix in self.matrices(kspace):
-            eigs,eigvecs=eigh(matrix)
-            for eig,eigvec in zip(eigs,eigvecs.T):
-                m+=dot(eigvec.conj().reshape((nmatrix,1)),eigvec.reshape((1,nmatrix)))*f(eig,self.mu)
+        f=(lambda es,mu: (es<=mu)*1.0) if abs(self.temperature)<RZERO else (lambda es,mu: 1/(exp((es-mu)/self.temperature)+1))
+        eigs,eigvecs=eigh(asarray(list(self.matrices(kspace))))
+        m=einsum('kia,ka,kja->ij',eigvecs.conj(),f(eigs,self.mu),eigvecs)
         nstate=(1 if kspace is None else kspace.rank('k'))*nmatrix/list(self.config.values())[0].nspin
         for key in self.ops.keys():
             self.ops[key].value=sum(m*self.ops[key].matrix)/nstate
@@ -11,7 +11,8 @@ Tight Binding Approximation for fermionic systems, including:
 __all__=['TBA','GSE','TBAGSE','TBAEB','TBADOS','TBABC','TBACN']
 
 from ..Basics import *
-from numpy import *
+from numpy import add,arange,array,asarray,complex64,complex128,conjugate,empty,exp,linspace,newaxis,ones,reciprocal,result_type,savetxt,searchsorted,sort,sqrt,square,subtract,sum,zeros
+from numpy.linalg import eigvalsh
 from scipy.linalg import eigh
 from collections import OrderedDict
 import HamiltonianPy as HP
@@ -31,6 +32,8 @@ class TBA(Engine):
         The terms of the system.
     mask : ['nambu'] or []
         ['nambu'] for not using the nambu space and [] for using the nambu space.
+    dtype : float32, float64, complex64, complex128
+        The data type of the matrix representation of the Hamiltonian.
     generator : Generator
         The operator generator for the Hamiltonian.
 
@@ -46,7 +49,7 @@ class TBA(Engine):
         ========    ==============================================
     '''
 
-    def __init__(self,lattice=None,config=None,terms=None,mask=('nambu',),**karg):
+    def __init__(self,lattice=None,config=None,terms=None,mask=('nambu',),dtype=complex128,**karg):
         '''
         Constructor.
 
@@ -60,13 +63,17 @@ class TBA(Engine):
             The terms of the system.
         mask : ['nambu'] or [], optional
             ['nambu'] for not using the nambu space and [] for using the nambu space.
+        dtype : float32, float64, complex64, complex128, optional
+            The data type of the matrix representation of the Hamiltonian.
         '''
         self.lattice=lattice
         self.config=config
         self.terms=terms
         self.mask=mask
+        self.dtype=dtype
         if self.map is None: self.parameters.update(OrderedDict((term.id,term.value) for term in terms))
-        self.generator=Generator(bonds=lattice.bonds,config=config,table=config.table(mask=mask),terms=terms,boundary=self.boundary,half=True)
+        self.generator=Generator(bonds=lattice.bonds,config=config,table=config.table(mask=mask),terms=terms,boundary=self.boundary,dtype=dtype,half=True)
+        self._arrays_=None
         self.logging()
 
     def update(self,**karg):
@@ -76,6 +83,7 @@ class TBA(Engine):
         if len(karg)>0:
             super(TBA,self).update(**karg)
             self.generator.update(**self.data)
+            self._arrays_=None
 
     @property
     def nmatrix(self):
@@ -101,16 +109,7 @@ class TBA(Engine):
             The matrix representation of the Hamiltonian.
         '''
         self.update(**karg)
-        nmatrix=self.nmatrix
-        result=zeros((nmatrix,nmatrix),dtype=complex128)
-        for opt in self.generator.operators:
-            phase=1 if len(k)==0 else exp(-1j*inner(k,opt.rcoord))
-            result[opt.seqs]+=opt.value*phase
-            if len(self.mask)==0:
-                i,j=opt.seqs
-                if i<nmatrix//2 and j<nmatrix//2: result[j+nmatrix//2,i+nmatrix//2]+=-opt.value*conjugate(phase)
-        result+=conjugate(result.T)
-        return result
+        return self._matrices_(None if len(k)==0 else asarray([k]))[0]
 
     def matrices(self,basespace=None,mode='*'):
         '''
@@ -129,10 +128,45 @@ class TBA(Engine):
         '''
         if basespace is None:
             yield self.matrix()
+        elif list(basespace.tags)==['k']:
+            ks,nblock=asarray([paras['k'] for paras in basespace(mode)]),max(2**20//self.nmatrix**2,1)
+            for i in range(0,len(ks),nblock):
+                for matrix in self._matrices_(ks[i:i+nblock]):
+                    yield matrix
         else:
             for paras in basespace(mode):
                 yield self.matrix(**paras)
 
+    def _matrices_(self,ks=None):
+        '''
+        The matrix representations of the Hamiltonian at a batch of k points, with all the phase factors obtained in one matrix product.
+
+        The seqs, values and rcoords of the operators are cached as arrays until the engine is updated.
+
+        Parameters
+        ----------
+        ks : 2d ndarray, optional
+            The coords of the k points, one per row.
+
+        Returns
+        -------
+        3d ndarray
+            The matrix representations of the Hamiltonian, one per k point, which are complex whenever k points are given.
+        '''
+        if self._arrays_ is None:
+            operators=list(self.generator.operators)
+            self._arrays_=asarray([opt.seqs for opt in operators],dtype=int).reshape((-1,2)),asarray([opt.value for opt in operators]),asarray([opt.rcoord for opt in operators])
+        (seqs,values,rcoords),nmatrix,dtype=self._arrays_,self.nmatrix,self.dtype if ks is None else result_type(self.dtype,complex64)
+        nk,result=1 if ks is None else len(ks),zeros((1 if ks is None else len(ks),nmatrix,nmatrix),dtype=dtype)
+        if len(values)>0:
+            phases=ones((1,len(values))) if ks is None else exp(-1j*ks.dot(rcoords.T))
+            add.at(result,(arange(nk)[:,newaxis],seqs[:,0],seqs[:,1]),values*phases)
+            if len(self.mask)==0:
+                nambu=(seqs[:,0]<nmatrix//2)&(seqs[:,1]<nmatrix//2)
+                add.at(result,(arange(nk)[:,newaxis],seqs[nambu,1]+nmatrix//2,seqs[nambu,0]+nmatrix//2),-values[nambu]*conjugate(phases[:,nambu]))
+        result+=conjugate(result.transpose((0,2,1)))
+        return result
+
     def eigvals(self,basespace=None,mode='*'):
         '''
         This method returns all the eigenvalues of the Hamiltonian.
@@ -152,7 +186,7 @@ class TBA(Engine):
         if basespace is None:
             result=eigh(self.matrix(),eigvals_only=True)
         else:
-            result=asarray([eigh(self.matrix(**paras),eigvals_only=True) for paras in basespace(mode)]).reshape(-1)
+            result=eigvalsh(asarray(list(self.matrices(basespace,mode)))).reshape(-1)
         return result
 
     def filling(self,mu,kspace=None):
@@ -259,8 +293,7 @@ def TBAEB(engine,app):
             result[:,0]=app.path.mesh(0)
         else:
             result[:,0]=array(range(app.path.rank(0)))
-        for i,paras in enumerate(app.path()):
-            result[i,1:]=eigh(engine.matrix(**paras),eigvals_only=True)
+        result[:,1:]=eigvalsh(asarray(list(engine.matrices(app.path))))
     else:
         result=zeros((2,nmatrix+1))
         result[:,0]=array(range(2))
@@ -279,9 +312,13 @@ def TBADOS(engine,app):
     eigvals=engine.eigvals(app.BZ)
     emin=eigvals.min() if app.emin is None else app.emin
     emax=eigvals.max() if app.emax is None else app.emax
-    for i,v in enumerate(linspace(emin,emax,num=app.ne)):
-       result[i,0]=v
-       result[i,1]=sum(app.eta/((v-eigvals)**2+app.eta**2))
+    result[:,0],buff=linspace(emin,emax,num=app.ne),empty(len(eigvals))
+    for i,v in enumerate(result[:,0]):
+        subtract(v,eigvals,out=buff)
+        square(buff,out=buff)
+        buff+=app.eta**2
+        reciprocal(buff,out=buff)
+        result[i,1]=app.eta*buff.sum()
     name='%s_%s'%(engine,app.name)
     if app.savedata: savetxt('%s/%s.dat'%(engine.dout,name),result)
     if app.plot: app.figure('L',result,'%s/%s'%(engine.dout,name))
@@ -1,5 +1,5 @@
 '''
-TBA test (2 tests in total).
+TBA test (3 tests in total).
 '''
 
 __all__=['tba']
@@ -10,7 +10,7 @@ from HamiltonianPy.FreeSystem.TBA import *
 from unittest import TestCase,TestLoader,TestSuite
 
 class TestTBA(TestCase):
-    def tbaconstruct(self,bc='op',t1=-1.0,t2=-0.5,mu=0.0,delta=0.4):
+    def tbaconstruct(self,bc='op',t1=-1.0,t2=-0.5,mu=0.0,delta=0.4,dtype=np.complex128):
         p1,p2,v=np.array([0.0,0.0]),np.array([0.5,0.0]),np.array([1.0,0.0])
         if bc=='op':
             lattice=Lattice(name='WG',rcoords=tiling(cluster=[p1,p2],vectors=[v],translations=range(20)))
@@ -26,7 +26,8 @@ class TestTBA(TestCase):
                         Onsite('mu',mu,modulate=lambda **karg:karg.get('mu',None)),
                         Pairing('delta',delta,neighbour=1,amplitude=lambda bond: 1 if bond.rcoord[0]>0 else -1)
                         ],
-            mask=       []
+            mask=       [],
+            dtype=      dtype
         )
         return result
 
@@ -45,6 +46,17 @@ class TestTBA(TestCase):
         pd.register(DOS(name='DOS',parameters={'mu':0.0},BZ=KSpace(reciprocals=pd.lattice.reciprocals,nk=10000),eta=0.01,ne=400,savedata=False,run=TBADOS))
         pd.summary()
 
+    def test_dtype(self):
+        print()
+        for bc in ('op','pd'):
+            real=self.tbaconstruct(bc=bc,t1=-1.0,t2=-0.5,mu=0.0,delta=0.4,dtype=np.float64)
+            cplx=self.tbaconstruct(bc=bc,t1=-1.0,t2=-0.5,mu=0.0,delta=0.4,dtype=np.complex128)
+            m1,m2=real.matrix(mu=0.3),cplx.matrix(mu=0.3)
+            self.assertEqual(m1.dtype,np.float64)
+            self.assertTrue(np.array_equal(m1,m2.real))
+            self.assertTrue(np.array_equal(m2.imag,np.zeros(m2.shape)))
+        self.assertTrue(np.allclose(real.matrix(k=[1.0,0.0]),cplx.matrix(k=[1.0,0.0])))
+
 tba=TestSuite([
             TestLoader().loadTestsFromTestCase(TestTBA),
             ])
@@ -14,7 +14,7 @@ import numpy.linalg as nl
 import scipy.interpolate as ip
 import scipy.optimize as op
 import warnings
-from collections import Callable
+from collections.abc import Callable
 
 def bisect(f,xs,args=()):
     '''
@@ -19,6 +19,28 @@ from HamiltonianPy.Misc import TOL
 from HamiltonianPy.TensorNetwork.Tensor import *
 from copy import copy
 
+def _absorb_(m,Lambda,axis):
+    '''
+    Absorb the singular values on a link into a 3d tensor along one of its virtual axes.
+    '''
+    if isinstance(m,DTensor) and (Lambda.ndim==0 or Lambda.labels[0].flow is None and Lambda.labels[0]==m.labels[axis]):
+        return DTensor(m.data*(Lambda.data[:,np.newaxis,np.newaxis] if axis==MPS.L and Lambda.ndim==1 else Lambda.data),labels=list(m.labels))
+    return Lambda*m if axis==MPS.L else m*Lambda
+
+def _chain_(datas):
+    '''
+    Contract a chain of 3d arrays from both of its ends toward the middle.
+    '''
+    if len(datas)==1: return datas[0]
+    mid=len(datas)//2
+    left=datas[0].reshape((-1,datas[0].shape[-1]))
+    for data in datas[1:mid]:
+        left=left.dot(data.reshape((data.shape[0],-1))).reshape((-1,data.shape[-1]))
+    right=datas[-1].reshape((datas[-1].shape[0],-1))
+    for data in reversed(datas[mid:-1]):
+        right=data.reshape((-1,data.shape[-1])).dot(right).reshape((data.shape[0],-1))
+    return left.dot(right)
+
 class MPS(Arithmetic,list):
     '''
     The general matrix product state, with each of its elements being a 3d tensor.
@@ -106,7 +128,16 @@ class MPS(Arithmetic,list):
         '''
         L,R=self[0].labels[MPS.L],self[-1].labels[MPS.R]
         assert L.dim==1 or R.dim==1
-        result=(np.product(self) if self.cut is None else np.product([m for m in it.chain(self.As,[self.Lambda],self.Bs)])).toarray()
+        if all(isinstance(m,DTensor) for m in self):
+            ms=list(self)
+            if self.cut is not None:
+                if self.cut<self.nsite:
+                    ms[self.cut]=_absorb_(ms[self.cut],self.Lambda,MPS.L)
+                else:
+                    ms[-1]=_absorb_(ms[-1],self.Lambda,MPS.R)
+            result=_chain_([m.data for m in ms])
+        else:
+            result=(np.product(self) if self.cut is None else np.product([m for m in it.chain(self.As,[self.Lambda],self.Bs)])).toarray()
         if L.dim==1 and R.dim==1:
             return result.reshape((-1,))
         elif L.dim==1:
@@ -133,6 +164,8 @@ class MPS(Arithmetic,list):
         '''
         The norm of the matrix product state.
         '''
+        if self.Lambda is not None and self[0].labels[MPS.L].dim==1 and self[-1].labels[MPS.R].dim==1 and all(self.iscanonical()):
+            return np.array([norm(self.Lambda.data)])
         temp=copy(self)
         temp.reset(cut=0)
         temp>>=temp.nsite
@@ -444,6 +477,16 @@ class MPS(Arithmetic,list):
         else:
             return super(MPS,self).__getitem__(k)
 
+    def __copy__(self):
+        '''
+        The shallow copy of an mps, sharing the tensors but not the list container.
+        '''
+        result=list.__new__(type(self))
+        result.extend(self)
+        result.Lambda=self.Lambda
+        result.cut=self.cut
+        return result
+
     def __str__(self):
         '''
         Convert an instance to string.
@@ -483,10 +526,10 @@ class MPS(Arithmetic,list):
         k,nmax,tol=other if isinstance(other,tuple) else (other,None,None)
         if k>=0:
             for _ in range(k):
-                self._set_B_and_lmove_(self[self.cut-1]*self.Lambda,nmax,tol)
+                self._set_B_and_lmove_(_absorb_(self[self.cut-1],self.Lambda,MPS.R),nmax,tol)
         else:
             for _ in range(-k):
-                self._set_A_and_rmove_(self.Lambda*self[self.cut],nmax,tol)
+                self._set_A_and_rmove_(_absorb_(self[self.cut],self.Lambda,MPS.L),nmax,tol)
         return self
 
     def __lshift__(self,other):
@@ -623,12 +666,24 @@ class MPS(Arithmetic,list):
         '''
         Judge whether each site of the MPS is in the canonical form.
         '''
-        result=[]
+        result,groups=[None]*self.nsite,{}
         for i,m in enumerate(self):
-            md=m.dagger
-            olds=[MPS.L,MPS.S] if i<self.cut else [MPS.S,MPS.R]
-            md.relabel(olds=olds,news=[md.labels[old].replace(prime=not md.labels[old].prime) for old in olds])
-            result.append(np.allclose((md*m).toarray(),np.identity(m.shape[MPS.R if i<self.cut else MPS.L]),atol=TOL))
+            if isinstance(m,DTensor):
+                groups.setdefault((i<self.cut,m.shape),[]).append(i)
+            else:
+                md=m.dagger
+                olds=[MPS.L,MPS.S] if i<self.cut else [MPS.S,MPS.R]
+                md.relabel(olds=olds,news=[md.labels[old].replace(prime=not md.labels[old].prime) for old in olds])
+                result[i]=np.allclose((md*m).toarray(),np.identity(m.shape[MPS.R if i<self.cut else MPS.L]),atol=TOL)
+        for (left,shape),indices in groups.items():
+            if left:
+                data=np.array([self[i].data for i in indices]).reshape((len(indices),-1,shape[MPS.R]))
+                buff=np.matmul(data.transpose((0,2,1)).conjugate(),data)
+            else:
+                data=np.array([self[i].data for i in indices]).reshape((len(indices),shape[MPS.L],-1))
+                buff=np.matmul(data,data.transpose((0,2,1)).conjugate())
+            for i,flag in zip(indices,np.isclose(buff,np.identity(buff.shape[-1]),atol=TOL).all(axis=(1,2))):
+                result[i]=bool(flag)
         return result
 
     def canonicalize(self,cut=0,nmax=None,tol=None):
@@ -644,7 +699,9 @@ class MPS(Arithmetic,list):
         tol : float, optional
             The tolerance of the singular values.
         '''
-        if cut<=self.nsite/2:
+        if self.Lambda is not None and tol is None and (nmax is None or self.nmax<=nmax) and self[0].labels[MPS.L].dim==1 and self[-1].labels[MPS.R].dim==1 and all(self.iscanonical()):
+            self<<=self.cut-cut
+        elif cut<=self.nsite/2:
             self.reset(cut=self.nsite)
             self<<=(self.nsite,nmax,tol)
             self>>=(cut,nmax,tol)
@@ -726,10 +783,10 @@ class MPS(Arithmetic,list):
             merge='L' if self.cut==self.nsite else 'R' if self.cut==0 else merge.upper()
             if merge=='L':
                 m,Lambda=self[self.cut-1],self.Lambda
-                self[self.cut-1]=m*Lambda
+                self[self.cut-1]=_absorb_(m,Lambda,MPS.R)
             else:
                 m,Lambda=self[self.cut],self.Lambda
-                self[self.cut]=Lambda*m
+                self[self.cut]=_absorb_(m,Lambda,MPS.L)
             self.cut=None
             self.Lambda=None
         else:
@@ -839,7 +896,7 @@ class MPS(Arithmetic,list):
         assert self.cut==self.nsite//2 and self.nsite%2==0 and len(sites)==len(bonds)-1==self.nsite>0
         lsms,rsms,us,vs=[],[],self.As,self.Bs
         for i,(L,S,R) in enumerate(zip(bonds[:self.cut],sites[:self.cut],bonds[1:self.cut+1])):
-            u,s,v=svd(vs[i]*self.Lambda if i==0 else vs[i],row=[MPS.L,MPS.S],new=Label('__IMPSPREDICTION_L_%i__'%i,None),col=[MPS.R])
+            u,s,v=svd(_absorb_(vs[i],self.Lambda,MPS.L) if i==0 else vs[i],row=[MPS.L,MPS.S],new=Label('__IMPSPREDICTION_L_%i__'%i,None),col=[MPS.R])
             L=u.labels[MPS.L].replace(identifier=L.identifier if isinstance(L,Label) else L)
             S=u.labels[MPS.S].replace(identifier=S.identifier if isinstance(S,Label) else S)
             R=u.labels[MPS.R].replace(identifier=R.identifier if isinstance(R,Label) else R)
@@ -851,7 +908,7 @@ class MPS(Arithmetic,list):
                 ml=s*v
                 ml.relabel([R.inverse.replace(identifier='__IMPSPREDICTION_ML_0__'),ml.labels[1].replace(identifier='__IMPSPREDICTION_C0__')])
         for i,(L,S,R) in enumerate(reversed(list(zip(bonds[self.cut:],sites[self.cut:],bonds[self.cut+1:])))):
-            u,s,v=svd(us[-1-i]*self.Lambda if i==0 else us[-1-i],row=[MPS.L],new=Label('__IMPSPREDICTION_R_%i__'%i,None),col=[MPS.S,MPS.R])
+            u,s,v=svd(_absorb_(us[-1-i],self.Lambda,MPS.R) if i==0 else us[-1-i],row=[MPS.L],new=Label('__IMPSPREDICTION_R_%i__'%i,None),col=[MPS.S,MPS.R])
             L=v.labels[MPS.L].replace(identifier=L.identifier if isinstance(L,Label) else L,qns=v.labels[MPS.L].qns+qn)
             S=v.labels[MPS.S].replace(identifier=S.identifier if isinstance(S,Label) else S)
             R=v.labels[MPS.R].replace(identifier=R.identifier if isinstance(R,Label) else R,qns=v.labels[MPS.R].qns+qn if i==0 else rsms[0].labels[MPS.L].qns)
@@ -862,7 +919,11 @@ class MPS(Arithmetic,list):
             else:
                 mr=u*s
                 mr.relabel([mr.labels[0].replace(identifier='__IMPSPREDICTION_C0__',qns=mr.labels[0].qns+qn),L.inverse.replace(identifier='__IMPSPREDICTION_MR_1__')])
-        u,s,v=svd(ml*Tensor(1.0/osvs,labels=[Label('__IMPSPREDICTION_C0__',qns=len(osvs),flow=None)])*mr,row=[0],new=Label('__IMPSPREDICTION_C1__',None),col=[1])
+        if isinstance(ml,DTensor):
+            ml=DTensor(ml.data*(1.0/osvs),labels=list(ml.labels))
+        else:
+            ml=ml*Tensor(1.0/osvs,labels=[Label('__IMPSPREDICTION_C0__',qns=len(osvs),flow=None)])
+        u,s,v=svd(ml*mr,row=[0],new=Label('__IMPSPREDICTION_C1__',None),col=[1])
         identifier=bonds[self.cut].identifier if isinstance(bonds[self.cut],Label) else bonds[self.cut]
         u.relabel(olds=[0],news=[u.labels[0].replace(identifier=identifier)])
         v.relabel(olds=[1],news=[v.labels[1].replace(identifier=identifier)])
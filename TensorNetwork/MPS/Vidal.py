@@ -9,7 +9,7 @@ Vidal matrix product states, including:
 
 __all__=['Vidal']
 
-from .MPS import MPS
+from .MPS import MPS,_absorb_,_chain_
 from ..Tensor import *
 
 class Vidal(object):
@@ -94,13 +94,11 @@ class Vidal(object):
         1d ndarray
             The corresponding normal representation of the state.
         '''
-        result=None
-        for i,Gamma in enumerate(self.Gammas):
-            if result is None:
-                result=Gamma
-            else:
-                result=result*self.Lambdas[i-1]*Gamma
-        return result.data.reshape((-1,))
+        ms=[Gamma if i==0 else _absorb_(Gamma,self.Lambdas[i-1],Vidal.L) for i,Gamma in enumerate(self.Gammas)]
+        if all(isinstance(m,DTensor) for m in ms): return _chain_([m.data for m in ms]).reshape((-1,))
+        result=ms[0]
+        for m in ms[1:]: result=result*m
+        return result.toarray().reshape((-1,))
 
     def tomixed(self,cut):
         '''
@@ -120,7 +118,7 @@ class Vidal(object):
         for i,Gamma in enumerate(self.Gammas):
             if i>0 and i==cut: Lambda=self.Lambdas[i-1]
             if i<cut:
-                ms.append(Gamma if i==0 else self.Lambdas[i-1]*Gamma)
+                ms.append(Gamma if i==0 else _absorb_(Gamma,self.Lambdas[i-1],Vidal.L))
             else:
-                ms.append(Gamma*self.Lambdas[i] if i<self.nsite-1 else Gamma)
+                ms.append(_absorb_(Gamma,self.Lambdas[i],Vidal.R) if i<self.nsite-1 else Gamma)
         return MPS(ms=ms,Lambda=Lambda,cut=cut)
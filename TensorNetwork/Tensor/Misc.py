@@ -17,6 +17,15 @@ from .TensorBase import Label
 from .Tensor import DTensor,STensor
 from HamiltonianPy import QuantumNumbers
 
+def _svd_(m):
+    '''
+    The thin svd of a matrix by the divide-and-conquer driver, which falls back to the QR driver when it does not converge.
+    '''
+    try:
+        return sl.svd(m,full_matrices=False,lapack_driver='gesdd',check_finite=False)
+    except sl.LinAlgError:
+        return sl.svd(m,full_matrices=False,lapack_driver='gesvd',check_finite=False)
+
 def random(labels,ttype='D',dtype=np.float64):
     '''
     Construct a random block-structured tensor.
@@ -235,7 +244,7 @@ def partitionedsvd(tensor,L,new,R,nmax=None,tol=None,ttype='D',returnerr=False):
         for qn in filter(lambda key: key in lod,rod):
             s1,s2=lod[qn],rod[qn]
             n1,n2=s1.stop-s1.start,s2.stop-s2.start
-            u,s,v=sl.svd(data[count:count+n1*n2].reshape((n1,n2)),full_matrices=False,lapack_driver='gesvd')[0:3]
+            u,s,v=_svd_(data[count:count+n1*n2].reshape((n1,n2)))
             us.append(u)
             ss.append(s)
             vs.append(v)
@@ -322,7 +331,7 @@ def svd(tensor,row,new,col,nmax=None,tol=None,returnerr=False,**karg):
         us,ss,vs,qns=[],[],[],[]
         for (rowqn,colqn),block in m.items():
             assert rowqn==colqn
-            u,s,v=sl.svd(block,full_matrices=False,lapack_driver='gesvd')[0:3]
+            u,s,v=_svd_(block)
             us.append(u)
             ss.append(s)
             vs.append(v)
@@ -351,7 +360,7 @@ def svd(tensor,row,new,col,nmax=None,tol=None,returnerr=False,**karg):
         rowod,colod=rowlabel.qns.toordereddict(),collabel.qns.toordereddict()
         us,ss,vs,qns=[],[],[],[]
         for qn in filter(lambda key: key in rowod,colod):
-            u,s,v=sl.svd(m[rowod[qn],colod[qn]],full_matrices=False,lapack_driver='gesvd')[0:3]
+            u,s,v=_svd_(m[rowod[qn],colod[qn]])
             us.append(u)
             ss.append(s)
             vs.append(v)
@@ -381,15 +390,15 @@ def svd(tensor,row,new,col,nmax=None,tol=None,returnerr=False,**karg):
         V=DTensor(V,labels=[new.replace(flow=+1),collabel]).split((collabel,col,np.argsort(colpermutation)))
         if returnerr: err=(temp[nmax:]**2).sum()
     else:
-        rowlabel=Label('__TENSOR_SVD_ROW__',qns=np.product([label.dim for label in row]))
-        collabel=Label('__TENSOR_SVD_COL__',qns=np.product([label.dim for label in col]))
-        m=tensor.merge((row,rowlabel),(col,collabel)).data
+        raxes,caxes=[tensor.axis(label) for label in row],[tensor.axis(label) for label in col]
+        rshape,cshape=tuple(tensor.data.shape[axis] for axis in raxes),tuple(tensor.data.shape[axis] for axis in caxes)
+        m=tensor.data.transpose(raxes+caxes).reshape((int(np.prod(rshape)),int(np.prod(cshape))))
         temp=hm.truncatedsvd(m,full_matrices=False,nmax=nmax,tol=tol,returnerr=returnerr,**karg)
         u,s,v=temp[0],temp[1],temp[2]
         new=new.replace(qns=len(s),flow=None)
-        U=DTensor(u,labels=[rowlabel,new.replace(flow=0)]).split((rowlabel,row))
+        U=DTensor(u.reshape(rshape+(len(s),)),labels=row+[new.replace(flow=0)])
         S=DTensor(s,labels=[new])
-        V=DTensor(v,labels=[new.replace(flow=0),collabel]).split((collabel,col))
+        V=DTensor(v.reshape((len(s),)+cshape),labels=[new.replace(flow=0)]+col)
         if returnerr: err=temp[3]
     return (U,S,V,err) if returnerr else (U,S,V)
 